@@ -1,17 +1,21 @@
 from parapy.geom import *
 from parapy.core import *
 from parapy.gui import display
-from wing_section import Wing_section
+from wing_section import Wing_section, AirfoilCurves
 from plain_flap import Plain_flap_section
 from fowler_flap import Fowler_flap_section
 from slotted_flap import Slotted_flap_section
-from read_input import get_input, check_input
+from read_input import get_input, check_input, error
 from hld_size import HLDsize
+from hld_kernel import solve_rear_spar
 from avl_wing import Avl_Wing
-from avl_wing import Avl_analysis
-from xfoil_analysis import XfoilAnalysis
-from bar import bar
+from avl_wing import Avl_analysis, alpha_sweep
+from avl_session import avl_session
+from xfoil_analysis import XfoilAnalysis, parallel_clmax, parallel_stations, reynolds_clmax, fill_unconverged
+from bar import bar, callback_bar, log_warning
+from job_context import JobContext, project_directory, scratch_directory, working_directory
 from write_pdf import write_pdf
+from stall_search import step_search, bracket_search, sweep_search, linear_search, affine_model, adaptive_clmax
 import numpy as np
 
 
@@ -30,14 +34,67 @@ class Fuselage(Base):
 class Model(Base):
 
     planform_file_name = Input('test_planform1')
+    planform_directory = Input('planforms')     # relative to project_root
+    project_root = Input(project_directory)     # folder with the airfoils, planforms, program_files and pdf_out
+    headless = Input(False)     # no popups or progress window, warnings and progress go to the callbacks or the log
+    warning_callback = Input(None)  # warning_callback(msg) receives warnings in headless mode
+    progress_callback = Input(None)     # progress_callback(percentage) receives the xfoil progress in headless mode
+    xfoil_jobs = Input(1)   # number of processes used for the xfoil analyses, 1 runs them one after another
+    xfoil_cache = Input(True)   # reuse xfoil polars stored on disk by earlier runs
+    clmax_search = Input("step")    # "step": 0.5 deg steps up to stall, "bracket": bracket stall and refine it,
+                                    # "sweep": the 0.5 deg steps of "step" run as cases of a single AVL run,
+                                    # "linear": solve a linear model of the strip lift coefficients for stall
+    stall_verify = Input(True)  # rerun AVL at the stall angle predicted by the "linear" search, and bracket the stall
+                                # angle instead when the strips there do not match the prediction
+    stall_tolerance = Input(0.05)   # accuracy of the stall angle in degrees for the "bracket" search
+    snap_hinge = Input(True)    # report the flap hinge location on the 0.01 grid instead of the continuous optimum
+    hld_charts = Input("polynomial")    # "table" evaluates the flap charts from interpolation tables
+    shown_deflection = Input(None)  # flap deflection in degrees shown in the geometry, None shows flap_deflection.
+                                    # Changing it only rotates the already split flaps again
+    analytic_sections = Input(False)    # XFOIL sections from the NACA equations instead of cutting the AVL surface
+    xfoil_stations = Input("all")   # "adaptive": analyse coarse stations and refine only where stall starts,
+                                    # "reynolds": analyse one section at a few Reynolds numbers and interpolate
+    xfoil_coarse = Input(5)     # number of equally spaced stations the "adaptive" mode starts from
+    xfoil_tolerance = Input(0.1)    # the "adaptive" mode stops when the stall angle changes less than this [deg]
+    xfoil_march = Input(False)  # march alpha up from zero lift until cl has peaked instead of -5 to 30 deg
+    xfoil_budget = Input(30)    # seconds a point of the xfoil_march may take before xfoil is killed
+    xfoil_reynolds = Input(4)   # number of Reynolds numbers the "reynolds" mode analyses
+    xfoil_validate = Input(False)   # also run all stations directly in "reynolds" mode, see xfoil_residual
+    xfoil_backend = Input("run_xfoil")  # "session": keep one XFOIL process per worker, without plot windows
+    avl_backend = Input("interface")    # "session": keep one AVL process per worker and only send it new cases. The
+                                        # session loads Avl_Wing.avl_file, not the kbeutils avl_configuration
+    xfoil_values = Input(None)  # clmax of the 20 stations computed elsewhere (async_runner), skips the xfoil runs
+    clmax_values = Input(None)  # result of the stall search computed elsewhere (async_runner), skips the AVL runs
+    analysis_only = Input(False)    # skip the CAD wing, its mirror and the AVL display surfaces, for batch runs
 
     @Attribute
     def input(self):
-        out = get_input("planforms/" + self.planform_file_name + ".txt")
+        out = get_input(self.job.path(self.planform_directory, self.planform_file_name + ".txt"), self.warn,
+                        self.project_root)
         if out.valid:
-            out = check_input(out, self.planform_file_name)
+            out = check_input(out, self.planform_file_name, self.warn, self.project_root)
         return out
 
+    @Attribute  # Data paths and the scratch directory for the solver files of this evaluation
+    def job(self):
+        return JobContext(self.project_root)
+
+    @Attribute  # function that reports warnings, None shows them in popups
+    def warn(self):
+        if self.headless:
+            return log_warning if self.warning_callback is None else self.warning_callback
+        return None
+
+    def warning(self, msg):     # popup, or warn in headless mode
+        if self.warn is None:
+            return error(msg)
+        return self.warn(msg)
+
+    def progress_bar(self):
+        if self.headless:
+            return callback_bar(self.progress_callback)
+        return bar()
+
     @Attribute
     def flap_hinge_location(self):
         return self.newspar
@@ -53,63 +110,160 @@ class Model(Base):
     def mach(self):
         return self.input.speed/343
 
-    @Attribute
+    def station_chord(self, j):
+        y = j/20 * self.input.wing_span
+        if y < self.input.kink_position:
+            return self.input.root_chord - (self.hld_size.chordroot-self.hld_size.chordkink)*(y/self.input.kink_position)
+        else:
+            y1 = y - self.input.kink_position
+            span = self.input.wing_span - self.input.kink_position
+            return self.hld_size.chordkink - (self.hld_size.chordkink-self.hld_size.chordtip)*(y1/span)
+
+    def xfoil_station(self, j):
+        return XfoilAnalysis(lifting_surface=self.avl_wing.surface1,
+                             cutting_plane_span_fraction=j/20,
+                             flydir=True,
+                             reynolds_number=self.reynolds(self.station_chord(j)),
+                             root_section=self.avl_wing.root_section,
+                             tip_section=self.avl_wing.kink_section,
+                             mach=self.mach,
+                             use_cache=self.xfoil_cache,
+                             analytic=self.analytic_sections,
+                             session=self.xfoil_backend == "session",
+                             scratch=self.job.scratch,
+                             adaptive=self.xfoil_march,
+                             budget=self.xfoil_budget)
+
+    def xfoil_clmax(self, stations):    # xfoil clmax of a list of station indices
+        if self.xfoil_jobs > 1:
+            return parallel_clmax(self.xfoil_jobs, [self.xfoil_station(j).job for j in stations])
+        return np.array([self.xfoil_station(j).clmax for j in stations])
+
+    @Attribute  # clmax of the 20 stations, stations where xfoil did not converge are interpolated and reported
     def xfoil(self):
-        clmaxfoil = np.zeros(20)
-        p_bar = bar()
+        if self.xfoil_values is not None:
+            clmax = self.xfoil_values
+        elif self.xfoil_stations == "adaptive":
+            clmax = self.xfoil_adaptive[0]
+        elif self.xfoil_stations == "reynolds":
+            clmax = self.xfoil_interpolated
+        else:
+            clmax = [clmax for clmax, status in self.xfoil_results]
+        clmax, unconverged = fill_unconverged(clmax)
+        if unconverged:
+            self.warning("Xfoil did not converge for the sections at stations " + str(unconverged) + ", their clmax "
+                         "was interpolated from the neighbouring stations.")
+        return clmax
+
+    @Attribute  # clmax and convergence status of each of the 20 stations
+    def xfoil_results(self):
+        p_bar = self.progress_bar()
         p_bar.update(0)
-        for j in range(20):
-            y = j/20 * self.input.wing_span
-            if y < self.input.kink_position:
-                chord = self.input.root_chord - (self.hld_size.chordroot-self.hld_size.chordkink)*(y/self.input.kink_position)
-            else:
-                y1 = y - self.input.kink_position
-                span = self.input.wing_span - self.input.kink_position
-                chord = self.hld_size.chordkink - (self.hld_size.chordkink-self.hld_size.chordtip)*(y1/span)
-            xfoil_analysis = XfoilAnalysis(lifting_surface=self.avl_wing.surface1,
-                                           cutting_plane_span_fraction=j/20,
-                                           flydir=True,
-                                           reynolds_number=self.reynolds(chord),
-                                           root_section=self.avl_wing.root_section,
-                                           tip_section=self.avl_wing.kink_section,
-                                           mach=self.mach)
-
-            clmaxfoil[j] = xfoil_analysis.clmax
-            p_bar.update(j*5)
+        if self.xfoil_jobs > 1:     # Sections are cut here, xfoil itself runs in a pool of processes
+            stations = []
+            for j in range(20):
+                stations.append(self.xfoil_station(j).job)
+                p_bar.update(j*2.5)
+            results = parallel_stations(self.xfoil_jobs, stations)
+        else:
+            results = []
+            for j in range(20):
+                station = self.xfoil_station(j)
+                results.append((station.clmax, station.convergence))
+                p_bar.update(j*5)
+        p_bar.update(100)
+        p_bar.kill()
+        return results
+
+    @Attribute  # Convergence status of every station, None unless all stations are analysed directly
+    def xfoil_status(self):
+        if self.xfoil_values is not None or self.xfoil_stations in ("adaptive", "reynolds"):
+            return None
+        return [status for clmax, status in self.xfoil_results]
+
+    @Attribute
+    # clmax of all stations from the mid station section analysed at xfoil_reynolds Reynolds numbers spanning the
+    # chords of the stations. The normalized sections only differ by their Reynolds number
+    def xfoil_interpolated(self):
+        p_bar = self.progress_bar()
+        p_bar.update(0)
+        reynolds_numbers = [self.reynolds(self.station_chord(j)) for j in range(20)]
+        clmaxfoil = reynolds_clmax(self.xfoil_station(10).job, reynolds_numbers, self.xfoil_reynolds,
+                                   self.xfoil_jobs)
         p_bar.update(100)
         p_bar.kill()
         return clmaxfoil
 
+    @Attribute  # Interpolated minus directly analysed clmax of every station, None unless xfoil_validate
+    def xfoil_residual(self):
+        if not self.xfoil_validate:
+            return None
+        return self.xfoil_interpolated - self.xfoil_clmax(range(20))
+
     @Attribute
-    def clmax(self):
-        Avl_aircraft = Avl_Wing(span=self.input.wing_span,
-                            taper_outer=self.input.taper_outer,
-                            le_sweep=self.input.sweep_deg,
-                            twist=self.input.twist,
-                            airfoil=self.input.airfoil_name,
-                            chord_root=self.input.root_chord,
-                            chord_kink=self.hld_size.chordkink,
-                            kink_positionm=self.input.kink_position,
-                            dihedral_deg=self.input.dihedral_deg,
-                            mach=self.mach)
-
-        aoa = 0
-        cltotlist = []
-        stall = 0
-
-        while stall < 1:
-            cases = [('fixed_aoa', {'alpha': aoa})]
-            analysis = Avl_analysis(aircraft=Avl_aircraft,
-                                    case_settings=cases)
+    # clmax of all stations interpolated from the stations analysed near the strip that stalls first, together with
+    # the analysed stations
+    def xfoil_adaptive(self):
+        cl0, cl_alpha, strip_cl0, strip_alpha = affine_model(self.avl_sweep)
+        p_bar = self.progress_bar()
+        p_bar.update(0)
+        analysed = []
+
+        def clmax_at(stations):
+            analysed.extend(stations)
+            p_bar.update(len(analysed)*5)
+            return self.xfoil_clmax(stations)
+
+        out = adaptive_clmax(clmax_at, strip_cl0, strip_alpha, self.xfoil_coarse, self.xfoil_tolerance)
+        p_bar.update(100)
+        p_bar.kill()
+        return out
+
+    @Attribute
+    def avl_aircraft(self):
+        return Avl_Wing(span=self.input.wing_span,
+                        taper_outer=self.input.taper_outer,
+                        le_sweep=self.input.sweep_deg,
+                        twist=self.input.twist,
+                        airfoil=self.input.airfoil_name,
+                        chord_root=self.input.root_chord,
+                        chord_kink=self.hld_size.chordkink,
+                        kink_positionm=self.input.kink_position,
+                        dihedral_deg=self.input.dihedral_deg,
+                        mach=self.mach,
+                        display_surfaces=False)
+
+    def avl_point(self, aoa):   # Total lift coefficient and lift coefficients of the 20 strips at one angle of attack
+        if self.avl_backend == "session":
+            cltot, clnorm = avl_session().point(self.avl_aircraft.avl_file, aoa)
+            return cltot, list(clnorm)
+        cases = [('fixed_aoa', {'alpha': aoa})]
+        analysis = Avl_analysis(aircraft=self.avl_aircraft,
+                                case_settings=cases)
+        with scratch_directory(self.job.scratch, "avl_") as directory, working_directory(directory):
             cltot = list(analysis.cltot)[0]
-            cltotlist.append(cltot)
-            aoa = aoa + 0.5
-            for k in range(20):
-                clnorm = list(analysis.strip(k))[0]
-                if clnorm > self.xfoil[k]:
-                    stall = stall + 1
+            clnorm = [list(analysis.strip(k))[0] for k in range(20)]
+        return cltot, clnorm
+
+    def avl_sweep(self, alphas):    # Same as avl_point for an array of angles of attack, in a single AVL run
+        if self.avl_backend == "session":
+            return avl_session().sweep(self.avl_aircraft.avl_file, alphas)
+        return alpha_sweep(self.avl_aircraft, alphas, self.job.scratch)
 
-        return cltotlist[-1], cltotlist
+    @Attribute
+    # Returns the lift coefficient at the first angle of attack where a strip exceeds the xfoil clmax of its section,
+    # together with the sampled lift curve (lift coefficients and angles of attack)
+    def clmax(self):
+        if self.clmax_values is not None:
+            return self.clmax_values
+        if self.clmax_search == "bracket":
+            return bracket_search(self.avl_point, self.xfoil, tol=self.stall_tolerance)
+        elif self.clmax_search == "sweep":
+            return sweep_search(self.avl_sweep, self.xfoil)
+        elif self.clmax_search == "linear":
+            return linear_search(self.avl_sweep, self.xfoil, verify=self.stall_verify)
+        else:
+            return step_search(self.avl_point, self.xfoil)
 
     @Part
     def avl_wing(self):
@@ -122,7 +276,8 @@ class Model(Base):
                         chord_kink=self.hld_size.chordkink,
                         kink_positionm=self.input.kink_position,
                         dihedral_deg=self.input.dihedral_deg,
-                        mach=self.mach)
+                        mach=self.mach,
+                        display_surfaces=not self.analysis_only)
 
     @Part
     def hld_size(self):
@@ -141,63 +296,64 @@ class Model(Base):
                        naca=self.input.airfoil_name,
                        clmaxclean=self.clmax[0],
                        clmaxflapped=self.input.clmax,
-                       flaptype=self.input.flap_type)
+                       flaptype=self.input.flap_type,
+                       charts=self.hld_charts,
+                       warn=self.warn,
+                       project_root=self.project_root)
 
     @Attribute
+    # Rear spar (flap hinge) location, snapped to 0.01 steps aft of the input rear spar unless snap_hinge is False
     def newspar(self):
         if self.hld_size.can_attain:
-            dcl45 = self.hld_size.dcl_flap[0]
-            dcl_target = self.hld_size.dcl_flap[1]
-            newspar = self.input.rear_spar
-            while dcl45 > dcl_target and newspar < 1.0:
-                newspar = newspar + 0.01
-                hldsize = HLDsize(root_chord=self.input.root_chord,
-                        kink_position=self.input.kink_position,
-                        sweep=self.input.sweep_deg,
-                        dihedral=self.input.dihedral_deg,
-                        taper_inner=self.input.taper_inner,
-                        taper_outer=self.input.taper_outer,
-                        wing_span=self.input.wing_span,
-                        frontpar=self.input.front_spar,
-                        rearspar=newspar,
-                        aileronloc=self.input.outer_flap_lim,
-                        fuselage_radius=self.input.fuselage_radius,
-                        flap_gap=self.input.flap_gap,
-                        naca=self.input.airfoil_name,
-                        clmaxclean=self.clmax[0],
-                        clmaxflapped=self.input.clmax,
-                        flaptype=self.input.flap_type)
-                dcl45 = hldsize.dcl_flap[0]
-                dcl_target = hldsize.dcl_flap[1]
+            snapped, continuous = solve_rear_spar(self.hld_size.dcl_margin, self.input.rear_spar)
+            return snapped if self.snap_hinge else continuous
         else:
-            newspar = self.input.rear_spar
-
+            return self.input.rear_spar - 0.01
 
-        return newspar - 0.01
+    @Attribute  # Continuous rear spar location at which the flap exactly delivers the required lift increment
+    def hinge_optimum(self):
+        return solve_rear_spar(self.hld_size.dcl_margin, self.input.rear_spar)[1]
 
     @Part
     def wing(self):
-        return Wing(input=self.input, flap_hinge_location=self.flap_hinge_location,
-                    color=self.input.colour, flap_deflection=self.flap_deflection)
+        return Wing(input=self.input, flap_hinge_location=self.flap_hinge_location, color=self.input.colour,
+                    flap_deflection=self.flap_deflection if self.shown_deflection is None else self.shown_deflection,
+                    suppress=self.analysis_only)
 
 
-    @Attribute
+    @Attribute  # the parts themselves, so a new flap deflection only invalidates the mirrored flaps
     def wing_parts(self):
         part_list = []
         for section in self.wing.children:
             for sub_section in section.children:
-                part_list.append(Solid(sub_section))
+                part_list.append(sub_section)
         return part_list
 
     @Part
     def mirror(self):
-        return MirroredShape(self.wing_parts[child.index], XOY, vector1=Vector(0, 0, 1), vector2=Vector(1, 0, 0),
-                             quantify=len(self.wing_parts)-1, color=self.input.colour)
+        return MirroredShape(Solid(self.wing_parts[child.index]), XOY, vector1=Vector(0, 0, 1), vector2=Vector(1, 0, 0),
+                             quantify=len(self.wing_parts)-1, color=self.input.colour, suppress=self.analysis_only)
+
+    @Attribute  # Sizing results, only numbers: nothing here needs the CAD wing
+    def report(self):
+        out = {"clmax_clean": float(self.clmax[0]),
+               "dclmax": float(self.input.clmax - self.clmax[0]),
+               "can_attain": bool(self.hld_size.can_attain),
+               "dcl45": float(self.hld_size.dcl_flap[0]),
+               "dcl_target": float(self.hld_size.dcl_flap[1]),
+               "flap_hinge_location": float(self.flap_hinge_location),
+               "flap_deflection": float(self.flap_deflection)}
+        if self.xfoil_status is not None:
+            out["xfoil_unconverged"] = sum(status != "converged" for status in self.xfoil_status)
+        if self.xfoil_residual is not None:
+            out["xfoil_residual"] = float(np.nanmax(np.abs(self.xfoil_residual)))     # NaN: not converged
+        return out
 
     @Attribute
     def export_pdf(self):
-        write_pdf(self.input, self.clmax[0], self.input.clmax - self.clmax[0], self.flap_hinge_location,
-                  self.planform_file_name, self.flap_deflection)
+        report = self.report
+        write_pdf(self.input, report["clmax_clean"], report["dclmax"], report["flap_hinge_location"],
+                  self.planform_file_name, report["flap_deflection"], self.job.path("pdf_out"))
         return "Done"
 
 
@@ -237,6 +393,10 @@ class Wing(Base):
             span = self.input.wing_span - self.input.kink_position
             return (self.kink_chord*(span - y1) + self.tip_chord*y1)/span
 
+    @Attribute  # the airfoil curve is fitted once for all sections
+    def airfoil_curves(self):
+        return AirfoilCurves(self.input.airfoil_coordinates)
+
     @Attribute
     def flap_function(self):
         if self.input.flap_type == "Plain":
@@ -252,32 +412,32 @@ class Wing(Base):
     def section_mid(self):
         return Wing_section(chords=[self.input.root_chord, self.chord(self.input.fuselage_radius)],
                             points=[self.le_pos(0), self.le_pos(self.input.fuselage_radius)],
-                            airfoil_coordinates=self.input.airfoil_coordinates)
+                            airfoil_coordinates=self.input.airfoil_coordinates, airfoil_curves=self.airfoil_curves)
     @Part
     def section_flap1(self):
         return self.flap_function(chords=[self.chord(self.input.fuselage_radius), self.kink_chord],
                                   points=[self.le_pos(self.input.fuselage_radius), self.le_pos(self.input.kink_position)],
-                                  airfoil_coordinates=self.input.airfoil_coordinates,
+                                  airfoil_coordinates=self.input.airfoil_coordinates, airfoil_curves=self.airfoil_curves,
                                   flap_deflection=self.flap_deflection, flap_hinge_location=self.flap_hinge_location)
 
     @Part
     def section_gap(self):
         return Wing_section(chords=[self.kink_chord, self.chord(self.input.kink_position+self.input.flap_gap)],
                             points=[self.le_pos(self.input.kink_position), self.le_pos(self.input.kink_position+self.input.flap_gap)],
-                            airfoil_coordinates=self.input.airfoil_coordinates)
+                            airfoil_coordinates=self.input.airfoil_coordinates, airfoil_curves=self.airfoil_curves)
 
     @Part
     def section_flap2(self):
         return self.flap_function(chords=[self.chord(self.input.kink_position+self.input.flap_gap), self.chord(self.input.outer_flap_lim*self.input.wing_span)],
                                   points=[self.le_pos(self.input.kink_position+self.input.flap_gap), self.le_pos(self.input.outer_flap_lim*self.input.wing_span)],
-                                  airfoil_coordinates=self.input.airfoil_coordinates,
+                                  airfoil_coordinates=self.input.airfoil_coordinates, airfoil_curves=self.airfoil_curves,
                                   flap_deflection=self.flap_deflection, flap_hinge_location=self.flap_hinge_location)
 
     @Part
     def section_outer(self):
         return Wing_section(chords=[self.chord(self.input.outer_flap_lim*self.input.wing_span), self.tip_chord],
                             points=[self.le_pos(self.input.outer_flap_lim*self.input.wing_span), self.le_pos(self.input.wing_span)],
-                            airfoil_coordinates=self.input.airfoil_coordinates, hidden=False)
+                            airfoil_coordinates=self.input.airfoil_coordinates, airfoil_curves=self.airfoil_curves, hidden=False)
 
     @Part
     def fuselage(self):
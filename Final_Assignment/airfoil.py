@@ -1,4 +1,8 @@
 
+import hashlib
+import os
+import numpy as np
+
 white_list = [" ", "\n", "\t"]
 separator = [" ", ",", "\t"]
 
@@ -95,6 +99,58 @@ def get_airfoil(name):
         return list(reversed(x_list)), list(reversed(y_list))
 
 
+def parse_airfoil(path):
+    # Vectorized version of get_airfoil, returns the coordinates as a contiguous (N, 2) array running from the
+    # trailing edge over the bottom to the leading edge and back over the top, with the same trailing edge closure
+    with open(path) as f:     # like read_coords, anything after the first two numbers on a line is ignored
+        rows = [line.split()[:2] for line in f.read().replace(",", " ").splitlines()]
+    points = np.array([row for row in rows if row], dtype=float)
+    if points[0, 0] < 0.1:      # Lednicer: top from LE to TE, then bottom from LE to TE
+        te = np.nonzero(points[:, 0] == 1)[0][0]
+        top, bottom = points[:te+1], points[te+1:].copy()
+        bottom[-1, 1] = top[-1, 1]
+        return np.ascontiguousarray(np.vstack([bottom[::-1], top]))
+    elif points[0, 0] > 0.9:    # Selig: from the TE over the top to the LE and back over the bottom
+        points = points[::-1].copy()
+        if points[0, 1] != points[-1, 1]:
+            points[0, 1] = points[-1, 1] = points[-1, 1]/2 + points[0, 1]/2
+        return points
+    raise ValueError("Airfoil file '" + path + "' does not start at the leading or trailing edge")
+
+
+_parsed = {}
+
+
+def load_airfoil(name, directory=os.path.join(os.path.dirname(os.path.abspath(__file__)), "airfoils")):
+    # Parses an airfoil file with parse_airfoil, parsed coordinates are kept in memory and in a binary cache file in
+    # directory/.cache (next to the index of AirfoilLibrary), keyed by the path and modification time of the file
+    path = os.path.abspath(os.path.join(directory, name + ".txt"))
+    cache_directory = os.path.join(os.path.dirname(path), ".cache")
+    mtime = os.stat(path).st_mtime_ns
+    if (path, mtime) in _parsed:
+        return _parsed[(path, mtime)]
+
+    prefix = name + "_" + hashlib.sha1(path.encode()).hexdigest()[:12] + "_"
+    cache_file = os.path.join(cache_directory, prefix + str(mtime) + ".npy")
+    try:
+        points = np.load(cache_file)
+    except (OSError, ValueError):
+        points = parse_airfoil(path)
+        try:
+            os.makedirs(cache_directory, exist_ok=True)
+            for old in os.listdir(cache_directory):     # remove cached versions of the file from before an edit
+                if old.startswith(prefix):
+                    os.remove(os.path.join(cache_directory, old))
+            temp = cache_file + ".%d.tmp" % os.getpid()
+            with open(temp, "wb") as f:
+                np.save(f, points)
+            os.replace(temp, cache_file)
+        except OSError:     # the cache is an optimization only
+            pass
+    _parsed[(path, mtime)] = points
+    return points
+
+
 if __name__ == "__main__":
     import matplotlib.pyplot as plt
     x, y = get_airfoil("whitcomb.txt")
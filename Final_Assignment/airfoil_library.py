@@ -0,0 +1,102 @@
+import json
+import os
+import numpy as np
+from airfoil import load_airfoil
+
+# Index of the airfoil files in the airfoils folder with their geometric properties. The folder is scanned once; the
+# properties are stored in airfoils/.cache/index.json and only recomputed for files that changed since.
+
+airfoil_directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), "airfoils")
+
+
+def airfoil_properties(points):
+    # points as returned by load_airfoil: from the TE over the bottom to the LE and back over the top
+    n_points = len(points)
+    points = points[np.r_[True, np.any(np.diff(points, axis=0) != 0, axis=1)]]   # Lednicer files repeat the LE
+    le = np.argmin(points[:, 0])
+    bottom, top = points[:le+1][::-1], points[le:]
+    bottom, top = bottom[np.argsort(bottom[:, 0], kind="stable")], top[np.argsort(top[:, 0], kind="stable")]
+    x_le, x_te = points[le, 0], max(points[0, 0], points[-1, 0])
+    x = x_le + (x_te - x_le)*(1 - np.cos(np.linspace(0, np.pi, 401)))/2
+    z_top, z_bottom = np.interp(x, top[:, 0], top[:, 1]), np.interp(x, bottom[:, 0], bottom[:, 1])
+    chord = x_te - x_le
+    thickness = (z_top - z_bottom)/chord
+    camber = (z_top + z_bottom)/2/chord
+    i_t, i_c = np.argmax(thickness), np.argmax(np.abs(camber))
+
+    # Leading edge radius from the circle through the leading edge point and its two neighbours
+    a, b, c = points[le-1], points[le], points[le+1]
+    sides = np.linalg.norm(a - b)*np.linalg.norm(b - c)*np.linalg.norm(c - a)
+    area = abs((b[0] - a[0])*(c[1] - a[1]) - (c[0] - a[0])*(b[1] - a[1]))/2
+    le_radius = sides/(4*area)/chord if area > 0 else 0.0
+
+    return {"thickness": float(thickness[i_t]),
+            "thickness_location": float((x[i_t] - x_le)/chord),
+            "camber": float(camber[i_c]),
+            "camber_location": float((x[i_c] - x_le)/chord),
+            "le_radius": float(le_radius),
+            "points": int(n_points)}
+
+
+class AirfoilLibrary:
+    def __init__(self, directory=airfoil_directory):
+        self.directory = directory
+        self.index_file = os.path.join(directory, ".cache", "index.json")
+        try:
+            with open(self.index_file) as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            stored = {}
+
+        self.index = {}
+        changed = False
+        for file_name in sorted(os.listdir(directory)):
+            name, extension = os.path.splitext(file_name)
+            if extension != ".txt":
+                continue
+            mtime = os.stat(os.path.join(directory, file_name)).st_mtime_ns
+            if name in stored and stored[name]["mtime"] == mtime:
+                self.index[name] = stored[name]
+                continue
+            try:
+                self.index[name] = airfoil_properties(load_airfoil(name, directory))
+            except (ValueError, IndexError):    # not a valid airfoil file
+                continue
+            self.index[name]["mtime"] = mtime
+            changed = True
+        if changed or set(stored) != set(self.index):
+            try:
+                os.makedirs(os.path.dirname(self.index_file), exist_ok=True)
+                with open(self.index_file, "w") as f:
+                    json.dump(self.index, f, indent=1)
+            except OSError:
+                pass
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def __getitem__(self, name):
+        return self.index[name]
+
+    def get(self, name, default=None):
+        return self.index.get(name, default)
+
+    def names(self):
+        return list(self.index)
+
+
+_libraries = {}
+
+
+def airfoil_library(directory=airfoil_directory):    # the folder is only scanned the first time it is requested
+    if directory not in _libraries:
+        _libraries[directory] = AirfoilLibrary(directory)
+    return _libraries[directory]
+
+
+if __name__ == "__main__":
+    library = airfoil_library()
+    print("%-8s %9s %7s %9s %7s" % ("name", "thickness", "camber", "LE radius", "points"))
+    for name in library.names():
+        p = library[name]
+        print("%-8s %9.4f %7.4f %9.4f %7d" % (name, p["thickness"], p["camber"], p["le_radius"], p["points"]))
@@ -0,0 +1,149 @@
+import asyncio
+import os
+import sys
+import numpy as np
+from asyncio.subprocess import PIPE, STDOUT
+from avl_session import avl_executable, case_script, parse_cases
+from xfoil_session import xfoil_executable, polar_script, read_polar, write_section, default_iterations
+from solver_session import SessionError
+from polar_cache import polar_cache, polar_key
+from job_context import scratch_directory
+from stall_search import sweep_search
+
+# Evaluates planforms with the solvers running as asyncio subprocesses. Every XFOIL station and the AVL sweep is one
+# solver process fed with its complete command script, at most processes solvers run at the same time and each one
+# is killed after timeout seconds. The sections are cut and the AVL geometry is written (ParaPy, in a worker thread)
+# while the XFOIL processes of the stations that are already cut are running, and the AVL sweep runs alongside the
+# XFOIL stations that are still outstanding. The runner follows Model with clmax_search "step" (or "sweep") and
+# xfoil_stations "all", other search and station options are rejected. The solvers do not get the same input as
+# with the default back ends of Model, so the results can differ slightly from it:
+#   - AVL runs on Avl_Wing.avl_file (avl_geometry, with NACA section points from naca_section), the file
+#     avl_backend="session" uses as well, instead of the kbeutils avl_configuration of avl_backend="interface"
+#   - XFOIL runs polar_script (ITER default_iterations) instead of run_xfoil, its polars are cached under their own
+#     mode ("script iterN") and are not shared with run_xfoil
+# Example:
+#     evaluate_sync("test_planform1", on_result=print)
+
+alpha_grid = 0.5*np.arange(81)  # angles of attack of the AVL sweep, the 0.5 deg steps of Model.clmax_search="step"
+
+
+async def run_solver(command, lines, cwd, timeout):
+    # Runs a solver on a command script in cwd and returns everything it printed
+    process = await asyncio.create_subprocess_exec(*command, cwd=cwd, stdin=PIPE, stdout=PIPE, stderr=STDOUT)
+    try:
+        out, _ = await asyncio.wait_for(process.communicate("".join(line + "\n" for line in lines).encode()), timeout)
+    except asyncio.TimeoutError:
+        raise SessionError(command[-1] + " gave no result within %g s" % timeout)
+    finally:
+        if process.returncode is None:  # timed out or cancelled
+            process.kill()
+            await process.wait()
+    return out.decode(errors="replace")
+
+
+class AsyncRunner:
+    def __init__(self, processes=None, timeout=120, xfoil=None, avl=None, on_result=None):
+        self.processes = os.cpu_count() if processes is None else processes
+        self.timeout = timeout
+        self.xfoil = command_line(xfoil_executable() if xfoil is None else xfoil)
+        self.avl = command_line(avl_executable() if avl is None else avl)
+        self.on_result = on_result  # on_result(kind, index, value) receives every solver result as it comes in
+        self.semaphore = None
+
+    async def solver(self, command, lines, cwd):
+        if self.semaphore is None:  # made here, it belongs to the running event loop
+            self.semaphore = asyncio.Semaphore(self.processes)
+        async with self.semaphore:
+            return await run_solver(command, lines, cwd, self.timeout)
+
+    def report(self, kind, index, value):
+        if self.on_result is not None:
+            self.on_result(kind, index, value)
+
+    async def xfoil_clmax(self, station, job, scratch):
+        points, reynolds_number, alpha, mach, use_cache = job[:5]
+        key = polar_key(points, reynolds_number, mach, alpha, "script iter%d" % default_iterations)
+        rows = polar_cache.get(key) if use_cache else None
+        if rows is None:
+            with scratch_directory(scratch, "xfoil_") as directory:
+                write_section(os.path.join(directory, "section.dat"), points)
+                await self.solver(self.xfoil, polar_script(reynolds_number, alpha, mach), directory)
+                rows = read_polar(os.path.join(directory, "polar.txt"))
+            if not rows:
+                raise SessionError("xfoil did not converge at any angle of attack for station %d" % station)
+            if use_cache:
+                polar_cache.put(key, rows)
+        clmax = max(row[1] for row in rows)
+        self.report("xfoil", station, clmax)
+        return station, clmax
+
+    async def avl_sweep(self, geometry, alphas, scratch):
+        with scratch_directory(scratch, "avl_") as directory:
+            with open(os.path.join(directory, "session.avl"), "w") as f:
+                f.write(geometry)
+            cltot, cl_norm = parse_cases(await self.solver(self.avl, case_script(alphas), directory))
+        self.report("avl", None, cltot)
+        return cltot, cl_norm
+
+    async def evaluate(self, planform_file_name, planform_directory="planforms", **options):
+        # Sizing report of one planform, options are passed on to Model
+        from Main import Model
+        for name, values in supported_options:
+            if name in options and options[name] not in values:
+                raise ValueError("the async runner does not support %s=%r" % (name, options[name]))
+        loop = asyncio.get_running_loop()
+        model = Model(planform_file_name=planform_file_name, planform_directory=planform_directory, headless=True,
+                      analysis_only=True, **options)
+        stations = []
+        sweep = None
+        try:
+            scratch = await loop.run_in_executor(None, lambda: model.job.scratch)
+            for j in range(20):     # every station starts as soon as its section is cut
+                job = await loop.run_in_executor(None, lambda: model.xfoil_station(j).job)
+                stations.append(asyncio.ensure_future(self.xfoil_clmax(j, job, scratch)))
+            geometry = await loop.run_in_executor(None, lambda: model.avl_aircraft.avl_file)
+            sweep = asyncio.ensure_future(self.avl_sweep(geometry, alpha_grid, scratch))
+
+            clmaxfoil = np.zeros(20)
+            for station in asyncio.as_completed(stations):
+                j, clmax = await station
+                clmaxfoil[j] = clmax
+            cltot, cl_norm = await sweep
+
+            # the sweep covers the angles of attack of sweep_search, which finds the first stalled angle in it
+            model.xfoil_values = clmaxfoil
+            model.clmax_values = sweep_search(lambda alphas: (cltot, cl_norm), clmaxfoil, step=alpha_grid[1],
+                                              batch=len(alpha_grid), max_alpha=alpha_grid[-1])
+            return await loop.run_in_executor(None, lambda: model.report)
+        finally:
+            for future in stations + [sweep]:
+                if future is not None:
+                    future.cancel()
+            model.job.remove()
+
+
+# Model options the runner only supports with these values, it implements clmax_search "step" for all stations
+supported_options = [("clmax_search", ("step", "sweep")), ("xfoil_stations", ("all",)), ("xfoil_march", (False,)),
+                     ("xfoil_values", (None,)), ("clmax_values", (None,))]
+
+
+def command_line(command):
+    return [command] if isinstance(command, str) else list(command)
+
+
+async def evaluate(planform_file_name, planform_directory="planforms", processes=None, timeout=120, on_result=None,
+                   **options):
+    runner = AsyncRunner(processes, timeout, on_result=on_result)
+    return await runner.evaluate(planform_file_name, planform_directory, **options)
+
+
+def evaluate_sync(planform_file_name, planform_directory="planforms", processes=None, timeout=120, on_result=None,
+                  **options):
+    if sys.platform == "win32":     # subprocesses need the proactor event loop on Windows
+        asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+    return asyncio.run(evaluate(planform_file_name, planform_directory, processes, timeout, on_result, **options))
+
+
+if __name__ == "__main__":
+    for name in sys.argv[1:] or ["test_planform1"]:
+        print(name, evaluate_sync(name, on_result=lambda kind, index, value: print("   ", kind, index, value)))
@@ -0,0 +1,125 @@
+import os
+import re
+import shutil
+import sys
+import numpy as np
+from naca_section import naca_points
+from solver_session import SolverSession, SessionError, pooled
+
+# AVL kept running between analyses. The geometry is loaded once and every angle of attack is a new case typed into
+# the OPER menu, the process is only restarted when the geometry changes. avl_session() hands out one session per
+# process and thread, so every worker of a pool keeps its own AVL.
+
+
+def avl_executable():
+    return os.environ.get("AVL_EXE") or shutil.which("avl") or "avl"
+
+
+def avl_geometry(name, mach, sref, cref, bref, airfoil, sections, n_chordwise=12, n_spanwise=20):
+    # Text of an AVL geometry file with one surface, duplicated about y = 0. sections holds (x_le, y_le, z_le, chord,
+    # incidence in degrees) of every section, airfoil a NACA designation. Cosine chordwise and equal spanwise spacing,
+    # like Avl_Wing.avl_surface1
+    lines = ["aircraft", "#Mach", "%g" % mach, "#IYsym IZsym Zsym", "0 0 0", "#Sref Cref Bref",
+             "%.6g %.6g %.6g" % (sref, cref, bref), "#Xref Yref Zref", "0 0 0",
+             "SURFACE", name, "#Nchord Cspace Nspan Sspace", "%d 1.0 %d 0.0" % (n_chordwise, n_spanwise),
+             "YDUPLICATE", "0.0"]
+    points = naca_points(airfoil)
+    for x, y, z, chord, incidence in sections:
+        lines += ["SECTION", "#Xle Yle Zle Chord Ainc", "%.6g %.6g %.6g %.6g %.6g" % (x, y, z, chord, incidence),
+                  "AIRFOIL"]
+        lines += ["%.6f %.6f" % (px, pz) for px, pz in points]
+    return "\n".join(lines) + "\n"
+
+
+def parse_cltot(text):
+    match = re.search(r"CLtot\s*=\s*(\S+)", text)
+    if match is None:
+        raise SessionError("no CLtot in the AVL output:\n" + text[-2000:])
+    return float(match.group(1))
+
+
+def parse_cl_norm(text):
+    # cl_norm of the strips of the first surface in the strip forces output, the column is found from the header
+    lines = text.splitlines()
+    for i, line in enumerate(lines):
+        if "cl_norm" in line:
+            column = line.replace("c cl", "c_cl").split().index("cl_norm")
+            break
+    else:
+        raise SessionError("no strip forces in the AVL output:\n" + text[-2000:])
+    cl_norm = []
+    for line in lines[i+1:]:
+        try:
+            values = [float(value) for value in line.split()]
+        except ValueError:
+            break
+        if len(values) <= column:
+            break
+        cl_norm.append(values[column])
+    return np.array(cl_norm)
+
+
+def case_script(alphas):
+    # Commands of a complete AVL run of session.avl at every angle of attack, for feeding AVL all at once
+    lines = ["LOAD session.avl", "OPER"]
+    for alpha in alphas:
+        lines += ["A A %.6g" % alpha, "X", "FS", ""]
+    return lines + ["", "QUIT"]
+
+
+def parse_cases(text):
+    # CLtot and strip cl_norm of every case in the output of a case_script run, in the order of the cases
+    starts = [match.start() for match in re.finditer(r"CLtot\s*=", text)]
+    parts = [text[start:end] for start, end in zip(starts, starts[1:] + [len(text)])]
+    return np.array([parse_cltot(part) for part in parts]), np.array([parse_cl_norm(part) for part in parts])
+
+
+class AvlSession(SolverSession):
+    def __init__(self, executable=None, cwd=None, timeout=60):
+        super().__init__(avl_executable() if executable is None else executable, cwd, timeout)
+        self.geometry = None
+
+    def load(self, geometry):
+        # Starts AVL with the geometry file text geometry, unless that geometry is already loaded
+        if self.alive and geometry == self.geometry:
+            return
+        self.close()
+        self.geometry = None
+        with open(os.path.join(self.cwd, "session.avl"), "w") as f:
+            f.write(geometry)
+        self.start()
+        self.expect()
+        self.run("LOAD session.avl")
+        self.run("OPER")
+        self.geometry = geometry
+
+    def point(self, geometry, alpha):
+        # CLtot and the strip cl_norm at one angle of attack
+        self.load(geometry)
+        self.run("A A %.6g" % alpha)
+        cltot = parse_cltot(self.run("X"))
+        return cltot, parse_cl_norm(self.run("FS", ""))   # empty file name: strip forces to the screen
+
+    def sweep(self, geometry, alphas):  # same as alpha_sweep: CLtot and a row of strip cl_norm per angle
+        results = [self.point(geometry, alpha) for alpha in alphas]
+        return np.array([r[0] for r in results]), np.array([r[1] for r in results])
+
+
+def avl_session(executable=None):  # the AVL session of this process and thread, started on first use
+    return pooled("avl", lambda: AvlSession(executable))
+
+
+if __name__ == "__main__":
+    # python avl_session.py --fake runs against fake_avl.py instead of AVL
+    executable = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_avl.py")] \
+        if "--fake" in sys.argv else None
+    wing = avl_geometry("wing", 0.2, 90, 3.5, 15, "2412", [(0, 0, 0, 5, 0), (1, 6, 0.3, 3.5, -1), (3, 15, 0.8, 2, -3)])
+    with AvlSession(executable) as session:
+        cltot, cl_norm = session.sweep(wing, [0, 2, 4])
+        print("CLtot:", cltot)
+        print("cl_norm of the first strips:", cl_norm[:, :4])
+        process = session.process
+        session.point(wing, 6)
+        print("process reused for a new case:", process is session.process)
+        session.point(wing.replace("0.2\n", "0.3\n", 1), 6)
+        print("process restarted for a new geometry:", process is not session.process)
@@ -5,6 +5,9 @@ from parapy.geom import *
 from parapy.gui import display
 from avl_section import Section
 import kbeutils.avl as avl
+import numpy as np
+from avl_session import avl_geometry
+from job_context import scratch_directory, working_directory
 
 
 
@@ -20,6 +23,7 @@ class Avl_Wing(GeomBase):
     kink_positionm = Input()
     dihedral_deg = Input()
     mach = Input()
+    display_surfaces = Input(True)  # surface2 and the mirrored surfaces are only for display, AVL uses the sections
 
     @Attribute
     def kink_position(self):
@@ -89,14 +93,16 @@ class Avl_Wing(GeomBase):
     @Part
     def surface2(self):
         return LoftedShell(profiles=[self.kink_section.curve, self.tip_section.curve],
-                           mesh_deflection=0.0001)
+                           mesh_deflection=0.0001,
+                           suppress=not self.display_surfaces)
     @Part
     def mirrored1(self):
         return MirroredSurface(surface_in=self.surface1.faces[0],
                                reference_point=self.position.point,
                                vector1=self.position.Vx,
                                vector2=self.position.Vz,
-                               mesh_deflection=0.0001)
+                               mesh_deflection=0.0001,
+                               suppress=not self.display_surfaces)
 
     @Part
     def mirrored2(self):
@@ -104,7 +110,8 @@ class Avl_Wing(GeomBase):
                                reference_point=self.position.point,
                                vector1=self.position.Vx,
                                vector2=self.position.Vz,
-                               mesh_deflection=0.0001)
+                               mesh_deflection=0.0001,
+                               suppress=not self.display_surfaces)
     @Part
     def avl_surface1(self):
         return avl.Surface(name=self.name,
@@ -116,6 +123,14 @@ class Avl_Wing(GeomBase):
                            sections=[self.root_section.avl_section, self.kink_section.avl_section, self.tip_section.avl_section])
 
 
+    @Attribute  # The same wing as an AVL geometry file, for avl_session
+    def avl_file(self):
+        sections = []
+        for position, chord, twist in zip(self.section_positions, self.chords,
+                                          [0, self.kink_position*self.twist, self.twist]):
+            sections.append((position.point[0], position.point[1], position.point[2], chord, twist))
+        return avl_geometry(self.name, self.mach, self.planform_area, self.mac, self.span, self.airfoil, sections)
+
     @Attribute
     def avl_surfaces(self):  # this scans the product tree and collect all instances of the avl.Surface class
         return self.find_children(lambda o: isinstance(o, avl.Surface))
@@ -169,6 +184,29 @@ class Avl_analysis(avl.Interface):
         return {result['Totals']['CLtot']
                 for case_name, result in self.results.items()}
 
+    @Attribute  # CLtot of every case, in the order of case_settings
+    def cltot_array(self):
+        return np.array([self.results[case_name]['Totals']['CLtot']
+                         for case_name, settings in self.case_settings])
+
+    @Attribute  # cl_norm of every strip (columns) for every case (rows), in the order of case_settings
+    def cl_norm_array(self):
+        return np.array([self.results[case_name]['StripForces'][self.aircraft.name]['cl_norm']
+                         for case_name, settings in self.case_settings])
+
+
+def alpha_cases(alphas):  # case names have to be unique, otherwise the results overwrite each other
+    return [('alpha_%d' % i, {'alpha': float(aoa)}) for i, aoa in enumerate(alphas)]
+
+
+def alpha_sweep(aircraft, alphas, scratch=None):
+    # Runs all angles of attack as cases of a single AVL run, returns CLtot and the strip cl_norm for every angle.
+    # AVL writes its files in the current directory, so it runs in a directory of its own inside scratch
+    analysis = Avl_analysis(aircraft=aircraft,
+                            case_settings=alpha_cases(alphas))
+    with scratch_directory(scratch, "avl_") as directory, working_directory(directory):
+        return analysis.cltot_array, analysis.cl_norm_array
+
     # @Attribute
     # def clmax(self):
     #     Avl_aircraft = Wing(name=self.name,
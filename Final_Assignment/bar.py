@@ -1,6 +1,9 @@
 import tkinter as tk
 from tkinter.ttk import Progressbar
 from tkinter import ttk
+import logging
+
+logger = logging.getLogger("hld_sizing")
 
 
 class bar:
@@ -20,3 +23,27 @@ class bar:
     def kill(self):
         self.parent.withdraw()
 
+
+
+class callback_bar:
+    # Same interface as bar, without a window. Progress is passed to callback(value), or logged when no callback is
+    # given, so it can be used in worker processes and on machines without a display
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.value = None
+
+    def update(self, value):
+        if value == self.value:
+            return
+        self.value = value
+        if self.callback is not None:
+            self.callback(value)
+        else:
+            logger.info("Calculating... %d%%", value)
+
+    def kill(self):
+        pass
+
+
+def log_warning(msg):    # headless replacement of the warning popups
+    logger.warning(msg)
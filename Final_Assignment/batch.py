@@ -0,0 +1,122 @@
+import argparse
+import csv
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from bar import logger
+
+# Runs the sizing of many planform files in a pool of processes and streams one result row per planform to a csv or
+# json lines file. Example:
+#     python batch.py "planforms/test_planform*.txt" -o results.csv --jobs 4
+
+project_dir = os.path.dirname(os.path.abspath(__file__))
+
+fields = ["planform", "status", "error", "clmax_clean", "can_attain", "dcl45", "dcl_target", "flap_hinge_location",
+          "flap_deflection", "xfoil_residual", "xfoil_unconverged", "time_input", "time_xfoil", "time_clmax",
+          "time_hld_size", "time_hinge", "time_total"]
+
+
+def find_planforms(patterns):
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "*.txt")
+        files += [f for f in sorted(glob.glob(pattern)) if os.path.basename(f).upper() != "READ_ME.TXT"]
+    return files
+
+
+def evaluate(file_name, options):
+    # Evaluates one planform file, every stage is timed separately. Errors are reported in the row instead of
+    # stopping the whole batch. Data paths are resolved against the project folder and the solvers write their files
+    # in the scratch directory of the model, so evaluations do not depend on the current directory
+    name = os.path.splitext(os.path.basename(file_name))[0]
+    row = {"planform": name, "status": "ok"}
+    start = time.perf_counter()
+    stage = start
+    model = None
+    try:
+        from Main import Model
+        model = Model(planform_file_name=name, planform_directory=os.path.dirname(os.path.abspath(file_name)),
+                      project_root=project_dir, **options)
+        for key, evaluate_stage in [("time_input", lambda: model.input),
+                                    ("time_xfoil", lambda: model.xfoil),
+                                    ("time_clmax", lambda: model.clmax),
+                                    ("time_hld_size", lambda: model.hld_size.dcl_flap),
+                                    ("time_hinge", lambda: model.flap_hinge_location)]:
+            evaluate_stage()
+            row[key] = time.perf_counter() - stage
+            stage = time.perf_counter()
+        row.update({key: value for key, value in model.report.items() if key in fields})
+    except Exception as e:
+        row["status"] = "failed"
+        row["error"] = type(e).__name__ + ": " + str(e)
+    finally:
+        if model is not None:
+            model.job.remove()
+    row["time_total"] = time.perf_counter() - start
+    return row
+
+
+class writer:
+    def __init__(self, file_name, output_format):
+        self.file = open(file_name, "w", newline="")
+        self.format = output_format
+        if output_format == "csv":
+            self.csv = csv.DictWriter(self.file, fieldnames=fields)
+            self.csv.writeheader()
+
+    def write(self, row):
+        if self.format == "csv":
+            self.csv.writerow(row)
+        else:
+            self.file.write(json.dumps(row) + "\n")
+        self.file.flush()   # results are written as soon as a planform is done
+
+    def close(self):
+        self.file.close()
+
+
+def summary(row):
+    return "%s: %s in %.1f s" % (row["planform"], row["status"], row["time_total"])
+
+
+def run_batch(patterns, output, jobs=1, output_format=None, on_result=None, **options):
+    # options are passed on to Model, use headless=True unless a display is available to every worker and
+    # analysis_only=True as nobody looks at the geometry. on_result(row) receives every row as soon as it is written,
+    # by default a summary of it is logged
+    files = find_planforms(patterns)
+    if output_format is None:
+        output_format = "csv" if output.endswith(".csv") else "jsonl"
+    out = writer(output, output_format)
+    rows = []
+    try:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(evaluate, os.path.abspath(f), options) for f in files]
+            for future in as_completed(futures):
+                row = future.result()
+                out.write(row)
+                rows.append(row)
+                if on_result is None:
+                    logger.info(summary(row))
+                else:
+                    on_result(row)
+    finally:
+        out.close()
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Size the high lift devices of many planform files")
+    parser.add_argument("planforms", nargs="+", help="planform files, directories or glob patterns")
+    parser.add_argument("-o", "--output", default="batch_results.csv", help="output file (.csv or .jsonl)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="number of processes")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="output format, by default from the extension")
+    parser.add_argument("--clmax-search", default="step", help="clean wing stall search, see Model.clmax_search")
+    parser.add_argument("--avl-backend", default="interface", help="\"session\" keeps one AVL process per worker")
+    parser.add_argument("--xfoil-backend", default="run_xfoil", help="\"session\" keeps one XFOIL process per worker")
+    args = parser.parse_args()
+    run_batch(args.planforms, args.output, args.jobs, args.format, lambda row: print(summary(row)),
+              clmax_search=args.clmax_search, headless=True, analysis_only=True, avl_backend=args.avl_backend,
+              xfoil_backend=args.xfoil_backend)
@@ -0,0 +1,81 @@
+import sys
+import time
+
+# Stand-in for the AVL executable for working on avl_session offline. It answers the subset of commands AvlSession
+# uses (LOAD, OPER, A A, X, FS, QUIT) with AVL's prompts and output layout, the forces come from a simple linear lift
+# model: the strip lift coefficients grow with the angle of attack and towards the tip. With --hang it never answers
+# the X command, like an AVL that does not come back. Run through
+#     python avl_session.py --fake
+# or the tests in test_avl_session.py
+
+
+def prompt(text):
+    sys.stdout.write(text)
+    sys.stdout.flush()
+
+
+def load(file_name):
+    n_spanwise = 20
+    with open(file_name) as f:
+        lines = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    mach = float(lines[1].split()[0])
+    for i, line in enumerate(lines):
+        if line == "SURFACE":
+            n_spanwise = int(lines[i+2].split()[2])
+    return mach, n_spanwise
+
+
+def main():
+    print(" ===================================================")
+    print("  Athena Vortex Lattice  Program (fake)")
+    print(" ===================================================")
+    mach, n_spanwise, alpha, loaded = 0.0, 20, 0.0, False
+    menu = "top"
+    while True:
+        prompt("\n .OPER (case 1/1)   c>  " if menu == "oper" else "\n AVL   c>  ")
+        line = sys.stdin.readline()
+        if not line:
+            return
+        words = line.split()
+        if menu == "top":
+            if not words:
+                continue
+            if words[0].upper() == "QUIT":
+                return
+            if words[0].upper() == "LOAD":
+                mach, n_spanwise = load(words[1])
+                loaded = True
+                print(" Configuration: aircraft")
+            elif words[0].upper() == "OPER" and loaded:
+                menu = "oper"
+            else:
+                print(" ** Unrecognized command")
+        elif not words:
+            menu = "top"
+        elif words[0].upper() == "A":
+            alpha = float(words[2])
+        elif words[0].upper() == "X":
+            while "--hang" in sys.argv:
+                time.sleep(1)
+            beta = (1 - mach**2)**-0.5
+            print(" Vortex Lattice Output -- Total Forces")
+            print("  Alpha = %9.5f" % alpha)
+            print("  CLtot = %9.5f     CDtot = %9.5f" % (beta*(0.25 + 0.09*alpha), 0.01))
+        elif words[0].upper() == "FS":
+            prompt("\n Enter filename, or <return> for screen output   s>  ")
+            sys.stdin.readline()
+            beta = (1 - mach**2)**-0.5
+            print(" Strip Forces referred to Strip Area, Chord")
+            print("    j     Yle    Chord     Area     c cl      ai      cl_norm  cl      cd      cdv    cm_c/4"
+                  "    cm_LE  C.P.x/c")
+            for j in range(n_spanwise):
+                eta = (j + 0.5)/n_spanwise
+                cl = beta*(0.25 + 0.09*alpha)*(0.9 + 0.3*eta)
+                print("  %3d %8.4f %8.4f %8.4f %8.4f %8.4f %8.4f %8.4f %8.4f %8.4f %8.4f %8.4f %8.4f"
+                      % (j + 1, eta, 1.0, 0.1, cl, 0.0, cl, cl, 0.01, 0.0, -0.05, -0.1, 0.25))
+        else:
+            print(" ** Unrecognized command")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 from parapy.geom import *
 from parapy.core import *
-from functions import p2v, v2p, interp_coords, split_coordinates, hinge_position
+from functions import p2v, v2p, hinge_position
 from wing_section import Wing_base
 import numpy as np
 
@@ -27,15 +27,13 @@ class Fowler_flap_section(Wing_base):
 
     @Attribute
     def camber_line(self):
-        xb, zb, xt, zt = split_coordinates(self.airfoil_coordinates)
         x_locations = np.linspace(self.flap_hinge_location, 1, 25)
+        camber = self.surface.camber(x_locations)
+        margin = (x_locations-self.flap_hinge_location)*0.01
         points_list_1, points_list_2 = [], []
         for i in range(len(x_locations)):
-            z_bottom = interp_coords(xb, zb, x_locations[i])
-            z_top = interp_coords(xt, zt, x_locations[i])
-            margin = (x_locations[i]-self.flap_hinge_location)*0.01
-            points_list_1.append(Point(x_locations[i], 0, (z_top + z_bottom)/2))
-            points_list_2.append(Point(x_locations[i], 0, (z_top+z_bottom)/2+margin))
+            points_list_1.append(Point(x_locations[i], 0, camber[i]))
+            points_list_2.append(Point(x_locations[i], 0, camber[i]+margin[i]))
         lines_1, lines_2 = [], []
         for i in range(2):
             lines_1.append(FittedCurve(np.array(points_list_1)*self.chords[i]+p2v(self.points[i])))
@@ -36,3 +36,37 @@ def interp_coords(x_list, z_list, x_target):
     dx = abs(x_list[closest1] - x_list[closest2])
     z_target = (z_list[closest1]*abs(x_list[closest2]-x_target) + z_list[closest2]*abs(x_list[closest1]-x_target))/dx
     return z_target
+
+
+class AirfoilSurface:
+    # Airfoil coordinates split at the leading edge into bottom and top surface, both sorted by x. Surface heights and
+    # camber at a whole array of x locations then follow from a single np.interp call
+    def __init__(self, airfoil_coordinates):
+        points = np.array([[c[0], c[2]] for c in airfoil_coordinates], dtype=float)
+        le = np.argmin(points[:, 0])
+        bottom, top = points[:le+1], points[le:]
+        bottom, top = bottom[np.argsort(bottom[:, 0], kind="stable")], top[np.argsort(top[:, 0], kind="stable")]
+        self.x_bottom, self.z_bottom = bottom[:, 0], bottom[:, 1]
+        self.x_top, self.z_top = top[:, 0], top[:, 1]
+
+    def top(self, x):
+        return np.interp(x, self.x_top, self.z_top)
+
+    def bottom(self, x):
+        return np.interp(x, self.x_bottom, self.z_bottom)
+
+    def camber(self, x):
+        return (self.top(x) + self.bottom(x))/2
+
+    def thickness(self, x):
+        return self.top(x) - self.bottom(x)
+
+
+_surfaces = {}
+
+
+def airfoil_surface(airfoil_coordinates):   # sections with the same airfoil share one AirfoilSurface
+    key = np.array([[c[0], c[2]] for c in airfoil_coordinates], dtype=float).tobytes()
+    if key not in _surfaces:
+        _surfaces[key] = AirfoilSurface(airfoil_coordinates)
+    return _surfaces[key]
@@ -0,0 +1,128 @@
+from math import pi
+from hld_functions import K_array, cldf_array, Kprime_array, adf_array
+from hld_tables import K_table, cldf_table, Kprime_table, adf_table
+from solvers import bracketed_root
+import numpy as np
+
+
+# Numeric part of the high lift device sizing, free of ParaPy. HLDsize delegates all of its arithmetic to HLDplanform
+# (geometry of the planform and the flapped area) and HLDsizing (the lift increment the flaps have to deliver), which
+# can also be used directly in batch runs. The planform does not depend on the clean wing CLmax, which itself needs
+# the planform chords. All planform parameters may be scalars or (broadcastable) arrays.
+
+
+class HLDplanform:
+    def __init__(self, root_chord, kink_position, sweep, dihedral, taper_inner, taper_outer, wing_span, rearspar,
+                 aileronloc, fuselage_radius, flap_gap):
+        tan_sweep = np.tan(np.radians(sweep))
+        tan_dihedral = np.tan(np.radians(dihedral))
+
+        self.coor1 = [0, 0, 0]
+        self.coor2 = [root_chord, 0, 0]
+        self.coor3 = [kink_position*tan_sweep, kink_position, kink_position*tan_dihedral]
+        self.coor4 = [kink_position*tan_sweep + root_chord*taper_inner, kink_position, kink_position*tan_dihedral]
+        self.chordkink = self.coor4[0] - self.coor3[0]
+        self.coor5 = [wing_span*tan_sweep, wing_span, wing_span*tan_dihedral]
+        self.coor6 = [wing_span*tan_sweep + self.chordkink*taper_outer, wing_span, wing_span*tan_dihedral]
+        self.chordroot = root_chord
+        self.chordtip = self.coor6[0] - self.coor5[0]
+
+        self.span = self.coor5[1] - self.coor1[1]
+        self.fuselageloc = fuselage_radius/self.span
+        self.kinkloc = (self.coor3[1] - self.coor1[1])/self.span
+        self.flap1stop = self.kinkloc
+        self.flap2start = self.flap1stop + flap_gap/self.span
+
+        self.chordfuselage = self.chordroot - (self.chordroot - self.chordkink)*(self.fuselageloc/self.kinkloc)
+        self.chordaileron = self.chordkink - (self.chordkink - self.chordtip)*((aileronloc - self.kinkloc) /
+                                                                              (1 - self.kinkloc))
+        self.chordflapstop = self.chord(self.flap1stop)
+        self.chordflapstart = self.chord(self.flap2start)
+        self.cfc = 1 - rearspar
+
+        self.area1 = (self.chordroot + self.chordkink)*np.sqrt(self.coor3[1]**2 + self.coor3[2]**2)/2
+        self.area2 = (self.chordkink + self.chordtip)*np.sqrt((self.coor5[1] - self.coor3[1])**2 +
+                                                              (self.coor5[2] - self.coor3[2])**2)/2
+        self.s = self.area1 + self.area2
+        self.sweep1_4_1 = np.arctan((self.coor3[0] + 0.25*self.chordkink - self.coor1[0] - 0.25*self.chordroot) /
+                                    (self.coor3[1] - self.coor1[1]))
+        self.sweep1_4_2 = np.arctan((self.coor5[0] + 0.25*self.chordtip - self.coor3[0] - 0.25*self.chordkink) /
+                                    (self.coor5[1] - self.coor3[1]))
+        self.avgsweep1_4 = (self.sweep1_4_1*self.area1 + self.sweep1_4_2*self.area2)/self.s
+
+        self.sf1 = np.where(self.flap1stop <= self.kinkloc,
+                            (self.chordfuselage + self.chordflapstop)*(self.flap1stop - self.fuselageloc)*self.span/2,
+                            (self.chordfuselage + self.chordkink)*(self.kinkloc - self.fuselageloc)*self.span/2 +
+                            (self.chordkink + self.chordflapstop)*(self.flap1stop - self.kinkloc)*self.span/2)
+        self.sf2 = np.where(self.flap2start < self.kinkloc,
+                            (self.chordflapstart + self.chordkink)*(self.kinkloc - self.flap2start)*self.span/2 +
+                            (self.chordkink + self.chordaileron)*(aileronloc - self.kinkloc)*self.span/2,
+                            (self.chordflapstart + self.chordaileron)*(aileronloc - self.flap2start)*self.span/2)
+        self.sf = self.sf1 + self.sf2
+
+    def chord(self, location):  # chord at a spanwise location given as fraction of the span
+        return np.where(location <= self.kinkloc,
+                        self.chordroot - (self.chordroot - self.chordkink)*(location/self.kinkloc),
+                        self.chordkink - (self.chordkink - self.chordtip)*((location - self.kinkloc)/(1 - self.kinkloc)))
+
+
+class HLDsizing:
+    def __init__(self, planform, t_c, clmaxclean, clmaxflapped, flaptype, clalpha=2*pi, trimfactor=1.1, angle_max=45,
+                 charts="polynomial"):
+        self.planform = planform
+        self.clmaxtrim = clmaxclean/trimfactor
+        self.flaps_required = self.clmaxtrim < clmaxflapped
+        self.dclmaxtrimmed = 1.05*(clmaxflapped - self.clmaxtrim)
+        self.klambda = (1 - 0.08*np.cos(planform.avgsweep1_4)**2)*np.cos(planform.avgsweep1_4)**(3/4)
+        self.dclmax = self.dclmaxtrimmed*self.klambda*planform.s/planform.sf
+
+        self.dcl_flap = dcl_flap(flaptype, planform.cfc, self.dclmax, t_c, clalpha, angle_max, charts)
+        self.can_attain = self.dcl_flap[0] >= self.dcl_flap[1]
+
+
+chart_functions = {"polynomial": (K_array, cldf_array, Kprime_array, adf_array),
+                   "table": (K_table, cldf_table, Kprime_table, adf_table)}
+
+
+def dcl_flap(flaptype, cfc, dclmax, t_c, clalpha=2*pi, angle_max=45, charts="polynomial"):
+    # Lift increment of the flap at the maximum deflection and the lift increment it has to deliver, charts="table"
+    # evaluates the flap charts from the interpolation tables in hld_tables
+    K, cldf, Kprime, adf = chart_functions[charts]
+    if flaptype == "Plain":
+        k = K(cfc, 1)
+        dcltarget = (1 / k) * dclmax
+        dcl45 = cldf(cfc, t_c) * np.radians(angle_max) * Kprime(angle_max, cfc)
+    elif flaptype == "Fowler":
+        k = K(cfc, 3)
+        dcltarget = (1 / k) * dclmax
+        clalphaf = clalpha * (1 + cfc)
+        dcl45 = clalphaf * adf(angle_max, cfc) * np.radians(angle_max)
+    elif flaptype == "Slotted":
+        k = K(cfc, 2)
+        dcltarget = (1 / k) * dclmax
+        dcl45 = clalpha * adf(angle_max, cfc) * np.radians(angle_max)
+    else:
+        dcl45 = dcltarget = np.nan*np.asarray(cfc)
+    return dcl45, dcltarget
+
+
+def solve_rear_spar(margin, rearspar, step=0.01, bracket=0.05, tol=1e-6):
+    # Finds how far aft the rear spar can move before the flap can no longer deliver the required lift increment,
+    # margin(rearspar) = dcl45 - dcltarget. Returns the location snapped to the step grid that marching aft from the
+    # original rear spar in steps would give, and the continuous location where the margin becomes zero.
+    # The first sign change is bracketed in steps of bracket before the root finder takes over.
+    if margin(rearspar) <= 0:
+        return rearspar - step, rearspar
+    lower = upper = rearspar
+    while margin(upper) > 0 and upper < 1.0:
+        lower, upper = upper, min(upper + bracket, 1.0)
+    if margin(upper) > 0:
+        continuous = 1.0
+    else:
+        continuous = bracketed_root(margin, lower, upper, tol=tol)[1]
+    n = max(1, int(np.ceil((continuous - rearspar)/step - 1e-9)))
+    while n > 1 and margin(rearspar + (n - 1)*step) <= 0:   # an earlier grid point may already have crossed zero
+        n = n - 1
+    while rearspar + n*step < 1.0 and margin(rearspar + n*step) > 0:
+        n = n + 1
+    return rearspar + (n - 1)*step, continuous
@@ -2,10 +2,10 @@ from math import *
 
 from parapy.core import *
 from parapy.geom import *
-from hld_functions import K, cldf, Kprime, adf, cldelta
-import warnings
+from hld_kernel import HLDplanform, HLDsizing, dcl_flap
+from airfoil_library import airfoil_library
+from job_context import project_path
 from tkinter import Tk, mainloop, X, messagebox
-import numpy as np
 class HLDsize(GeomBase):
 
 
@@ -30,201 +30,196 @@ class HLDsize(GeomBase):
     trimfactor = Input(1.1)
     flaptype = Input()
     angle_max = Input(45)
+    charts = Input("polynomial")    # "polynomial" evaluates the chart fits directly, "table" uses hld_tables
+    warn = Input(None)  # function called with warning messages, None shows them in a popup
+    project_root = Input(None)  # folder with the airfoils folder, the project folder by default
 
-    @Attribute
+    @Attribute  # thickness ratio from the airfoil library, from the NACA designation if there is no airfoil file
     def t_c(self):
+        library = airfoil_library(project_path(self.project_root, "airfoils"))
+        if self.naca in library:
+            return library[self.naca]["thickness"]
         return int(self.naca[-2:])/100
 
+    def error(self, msg):
+        if self.warn is None:
+            return error(msg)
+        return self.warn(msg)
+
+    @Attribute  # planform geometry from the ParaPy-free kernel in hld_kernel, independent of clmaxclean
+    def planform(self):
+        return HLDplanform(root_chord=self.root_chord,
+                           kink_position=self.kink_position,
+                           sweep=self.sweep,
+                           dihedral=self.dihedral,
+                           taper_inner=self.taper_inner,
+                           taper_outer=self.taper_outer,
+                           wing_span=self.wing_span,
+                           rearspar=self.rearspar,
+                           aileronloc=self.aileronloc,
+                           fuselage_radius=self.fuselage_radius,
+                           flap_gap=self.flap_gap)
+
+    @Attribute  # lift increment arithmetic of the kernel, only built once clmaxclean is needed
+    def kernel(self):
+        return HLDsizing(planform=self.planform,
+                         t_c=self.t_c,
+                         clmaxclean=self.clmaxclean,
+                         clmaxflapped=self.clmaxflapped,
+                         flaptype=self.flaptype,
+                         clalpha=self.clalpha,
+                         trimfactor=self.trimfactor,
+                         angle_max=self.angle_max,
+                         charts=self.charts)
+
     @Attribute
     def fuselageloc(self):
-        return self.fuselage_radius/self.span
+        return self.planform.fuselageloc
 
     @Attribute
     def coor1(self):
-        return [0, 0, 0]
+        return self.planform.coor1
 
     @Attribute
     def coor2(self):
-        return [self.root_chord, 0, 0]
+        return self.planform.coor2
 
     @Attribute
     def coor3(self):
-        return [self.kink_position*np.tan(radians(self.sweep)), self.kink_position, self.kink_position*np.tan(radians(self.dihedral))]
+        return self.planform.coor3
 
     @Attribute
     def coor4(self):
-        return [self.kink_position * np.tan(radians(self.sweep)) + self.root_chord*self.taper_inner, self.kink_position,
-                self.kink_position * np.tan(radians(self.dihedral))]
-
-    @Attribute
-    def chordkink(self):
-        return self.coor4[0] - self.coor3[0]
+        return self.planform.coor4
 
     @Attribute
     def coor5(self):
-        return [self.wing_span * np.tan(radians(self.sweep)),
-                self.wing_span,
-                self.wing_span * np.tan(radians(self.dihedral))]
+        return self.planform.coor5
 
     @Attribute
     def coor6(self):
-        return [self.wing_span * np.tan(radians(self.sweep)) + self.chordkink*self.taper_outer,
-                self.wing_span,
-                self.wing_span * np.tan(radians(self.dihedral))]
+        return self.planform.coor6
 
     @Attribute
     def chordroot(self):
-        return self.root_chord
+        return self.planform.chordroot
 
     @Attribute
     def chordkink(self):
-        return self.coor4[0]-self.coor3[0]
+        return self.planform.chordkink
+
     @Attribute
     def chordtip(self):
-        return self.coor6[0]-self.coor5[0]
-
+        return self.planform.chordtip
 
     @Attribute
     def span(self):
-        return self.coor5[1]-self.coor1[1]
+        return self.planform.span
 
     @Attribute
     def kinkloc(self):
-        return (self.coor3[1]-self.coor1[1])/self.span
+        return self.planform.kinkloc
 
     @Attribute
     def flap1stop(self):
-        return self.kinkloc
+        return self.planform.flap1stop
 
     @Attribute
     def flap2start(self):
-        return self.flap1stop + self.flap_gap/self.span
+        return self.planform.flap2start
 
     @Attribute
     def chordfuselage(self):
-        return self.chordroot - (self.chordroot - self.chordkink) * (self.fuselageloc/self.kinkloc)
+        return self.planform.chordfuselage
 
     @Attribute
     def chordaileron(self):
-        return self.chordkink - (self.chordkink- self.chordtip) * ((self.aileronloc-self.kinkloc) / (1-self.kinkloc))
+        return self.planform.chordaileron
 
     @Attribute
     def chordflapstop(self):
-        if self.flap1stop <= self.kinkloc:
-            chordflapstop = self.chordroot - (self.chordroot - self.chordkink) * (self.flap1stop / self.kinkloc)
-        elif self.flap1stop > self.kinkloc:
-            chordflapstop = self.chordkink - (self.chordkink - self.chordtip) * ((self.flap1stop-self.kinkloc) / (1-self.kinkloc))
-        return chordflapstop
+        return self.planform.chordflapstop
 
     @Attribute
     def chordflapstart(self):
-        if self.flap2start <= self.kinkloc:
-            chordflapstart = self.chordroot - (self.chordroot - self.chordkink) * (self.flap2start / self.kinkloc)
-        elif self.flap2start > self.kinkloc:
-            chordflapstart = self.chordkink - (self.chordkink - self.chordtip) * (
-                        (self.flap2start - self.kinkloc) / (1 - self.kinkloc))
-        return chordflapstart
+        return self.planform.chordflapstart
 
     @Attribute
     def cfc(self):
-        return 1 - self.rearspar
+        return self.planform.cfc
 
     @Attribute
     def area1(self):
-        return (self.chordroot + self.chordkink) * sqrt(
-            self.coor3[1] ** 2 + self.coor3[2] ** 2) / 2
+        return self.planform.area1
 
     @Attribute
     def area2(self):
-        return (self.chordkink + self.chordtip) * sqrt(
-            (self.coor5[1] - self.coor3[1]) ** 2 + (self.coor5[2] - self.coor3[2]) ** 2) / 2
+        return self.planform.area2
 
     @Attribute
     def s(self):
-        return self.area1 + self.area2
+        return self.planform.s
 
     @Attribute
     def sweep1_4_1(self):
-        return atan((self.coor3[0]+0.25*self.chordkink-self.coor1[0]-0.25*self.chordroot)/(self.coor3[1]-self.coor1[1]))
+        return self.planform.sweep1_4_1
 
     @Attribute
     def sweep1_4_2(self):
-        return atan((self.coor5[0]+0.25*self.chordtip-self.coor3[0]-0.25*self.chordkink)/(self.coor5[1]-self.coor3[1]))
+        return self.planform.sweep1_4_2
 
     @Attribute
     def avgsweep1_4(self):
-        return (self.sweep1_4_1*self.area1+self.sweep1_4_2*self.area2)/self.s
-
-
+        return self.planform.avgsweep1_4
 
     @Attribute
     def sf1(self):
-        if self.flap1stop <= self.kinkloc:
-            sf1 = (self.chordfuselage+self.chordflapstop)*(self.flap1stop-self.fuselageloc)*self.span/2
-        elif self.flap1stop > self.kinkloc:
-            sf1 = (self.chordfuselage+self.chordkink)*(self.kinkloc-self.fuselageloc)*self.span/2 + (self.chordkink+self.chordflapstop)*(self.flap1stop-self.kinkloc)*self.span/2
-        return sf1
+        return self.planform.sf1
 
     @Attribute
     def sf2(self):
-        if self.flap2start < self.kinkloc:
-            sf2 = (self.chordflapstart + self.chordkink) * (self.kinkloc - self.flap2start) * self.span / 2 + (
-                        self.chordkink + self.chordaileron) * (self.aileronloc - self.kinkloc) * self.span / 2
-        elif self.flap2start >= self.kinkloc:
-            sf2 = (self.chordflapstart + self.chordaileron) * (self.aileronloc - self.flap2start) * self.span / 2
-        return sf2
+        return self.planform.sf2
 
     @Attribute
     def sf(self):
-        return self.sf1+self.sf2
+        return self.planform.sf
 
     @Attribute
     def clmaxtrim(self):
-        return self.clmaxclean/self.trimfactor
+        return self.kernel.clmaxtrim
 
     @Attribute
     def dclmaxtrimmed(self):
-        if self.clmaxtrim >= self.clmaxflapped:
-            error('The clean wing can already attain the required CLmax, no flaps are required.')
-        return 1.05*(self.clmaxflapped-self.clmaxtrim)
+        return self.kernel.dclmaxtrimmed
 
     @Attribute
     def klambda(self):
-        return (1-0.08*cos(self.avgsweep1_4)**2)*cos(self.avgsweep1_4)**(3/4)
+        return self.kernel.klambda
 
     @Attribute
     def dclmax(self):
-        return self.dclmaxtrimmed*self.klambda*self.s/self.sf
+        return self.kernel.dclmax
 
     @Attribute
     def dcl_flap(self):
-        if self.flaptype == "Plain":
-            k = K(self.cfc, 1)
-            dcltarget = (1 / k) * self.dclmax
-            dcl45 = cldf(self.cfc, self.t_c) * radians(self.angle_max) * Kprime(self.angle_max, self.cfc)
-            return dcl45, dcltarget
-        elif self.flaptype == "Fowler":
-            k = K(self.cfc, 3)
-            dcltarget = (1 / k) * self.dclmax
-            clalphaf = self.clalpha * (1 + self.cfc)
-            dcl45 = clalphaf * adf(self.angle_max, self.cfc) * radians(self.angle_max)
-            return dcl45, dcltarget
-        elif self.flaptype == "Slotted":
-            k = K(self.cfc, 2)
-            dcltarget = (1 / k) * self.dclmax
-            dcl45 = self.clalpha * adf(self.angle_max, self.cfc) * radians(self.angle_max)
-            return dcl45, dcltarget
-        else:
-            return error('Flap name not recognised')
+        if self.flaptype not in ["Plain", "Fowler", "Slotted"]:
+            return self.error('Flap name not recognised')
+        if not self.kernel.flaps_required:
+            self.error('The clean wing can already attain the required CLmax, no flaps are required.')
+        return self.kernel.dcl_flap
+
+    def dcl_margin(self, rearspar):   # dcl45 - dcltarget with the rear spar (flap hinge) at the given chord fraction
+        dcl45, dcltarget = dcl_flap(self.flaptype, 1 - rearspar, self.dclmax, self.t_c, self.clalpha, self.angle_max,
+                                    self.charts)
+        return dcl45 - dcltarget
 
     @Attribute
     def can_attain(self):
-        if self.dcl_flap[0] >= self.dcl_flap[1]:
-            attain_flap = True
-        elif self.dcl_flap[0] < self.dcl_flap[1]:
-            attain_flap = False
-            error('With the chosen flap type and rear spar location, the wing cannot attain the specified CLmax.'
-                  'Choose a different flap type, move the rear spar forward or increase the maximum deflection angle of the flap')
+        dcl45_target = self.dcl_flap     # None for an unknown flap type
+        attain_flap = dcl45_target is not None and bool(dcl45_target[0] >= dcl45_target[1])
+        if not attain_flap:
+            self.error('With the chosen flap type and rear spar location, the wing cannot attain the specified CLmax.'
+                       'Choose a different flap type, move the rear spar forward or increase the maximum deflection angle of the flap')
         return attain_flap
 
 
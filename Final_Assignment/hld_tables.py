@@ -0,0 +1,114 @@
+import numpy as np
+import hld_functions as charts
+
+# Table-backed versions of the chart functions in hld_functions. Each polynomial is sampled once, on first use, on a
+# fine grid over the range in which the chart was digitized; queries are answered by cubic Hermite interpolation
+# (using the exact derivative of the polynomial at the grid points) or by linear interpolation. Queries outside the
+# digitized range raise a ValueError instead of silently extrapolating the polynomial.
+
+# name: (coefficients, lower bound, upper bound, argument)
+_CHARTS = {"K_plain": (charts._K_PLAIN, 0, 0.6, "cfc"),
+           "K_slotted": (charts._K_SLOTTED, 0, 0.6, "cfc"),
+           "K_fowler": (charts._K_FOWLER, 0, 0.6, "cfc"),
+           "cldf0": (charts._CLDF0, 0, 0.5, "cfc"),
+           "cldf15": (charts._CLDF15, 0, 0.5, "cfc"),
+           "kprime10": (charts._KPRIME10, 10, 70, "df"),
+           "kprime50": (charts._KPRIME50, 10, 70, "df"),
+           "adf15": (charts._ADF15, 0, 80, "df"),
+           "adf40": (charts._ADF40, 0, 80, "df"),
+           "cldelta": (charts._CLDELTA, 0, 0.5, "cfc")}
+
+_tables = {}
+
+
+class ChartTable:
+    def __init__(self, name, points=1001):
+        coefficients, self.lower, self.upper, self.argument = _CHARTS[name]
+        self.name = name
+        self.coefficients = coefficients
+        self.x = np.linspace(self.lower, self.upper, points)
+        self.y = charts.polynomial(coefficients, self.x)
+        self.dy = np.polyval(np.polyder(np.array(coefficients[::-1])), self.x)
+
+    def __call__(self, x, kind="cubic"):
+        x = np.asarray(x, dtype=float)
+        if np.any(x < self.lower) or np.any(x > self.upper):
+            raise ValueError("%s = %s is outside of the range %g-%g of the %s chart"
+                             % (self.argument, x[(x < self.lower) | (x > self.upper)].ravel()[0], self.lower,
+                                self.upper, self.name))
+        if kind == "linear":
+            return np.interp(x, self.x, self.y)
+        h = self.x[1] - self.x[0]
+        i = np.clip(((x - self.lower)/h).astype(int), 0, len(self.x) - 2)
+        t = (x - self.x[i])/h
+        return (2*t**3 - 3*t**2 + 1)*self.y[i] + (t**3 - 2*t**2 + t)*h*self.dy[i] + \
+            (-2*t**3 + 3*t**2)*self.y[i+1] + (t**3 - t**2)*h*self.dy[i+1]
+
+
+def table(name):    # tables are built on first use
+    if name not in _tables:
+        _tables[name] = ChartTable(name)
+    return _tables[name]
+
+
+def K_table(cfc, flaptype, kind="cubic"):
+    names = {1: "K_plain", 2: "K_slotted", 3: "K_fowler"}
+    if flaptype not in names:
+        raise ValueError("Unknown flap type " + str(flaptype) + ", use 1 (plain), 2 (slotted) or 3 (fowler)")
+    return table(names[flaptype])(cfc, kind)
+
+
+def cldf_table(cfc, tc, kind="cubic"):
+    cldf0 = table("cldf0")(cfc, kind)
+    cldf15 = table("cldf15")(cfc, kind)
+    return (cldf15-cldf0)*np.asarray(tc)/0.15 + cldf0
+
+
+def Kprime_table(df, cfc, kind="cubic"):
+    kprime50 = table("kprime50")(df, kind)
+    kprime10 = table("kprime10")(df, kind)
+    return (kprime50-kprime10)/(0.50-0.10)*np.asarray(cfc) + kprime10 - (kprime50-kprime10)/(0.50-0.10)*0.10
+
+
+def adf_table(df, cfc, kind="cubic"):
+    adf15 = table("adf15")(df, kind)
+    adf40 = table("adf40")(df, kind)
+    return (adf40-adf15)/(0.40-0.15)*np.asarray(cfc) + adf15 - (adf40-adf15)/(0.40-0.15)*0.15
+
+
+def cldelta_table(cfc, kind="cubic"):
+    return table("cldelta")(cfc, kind)
+
+
+def table_error(kind="cubic", samples=100000):
+    # Largest absolute difference between the tables and the polynomials, evaluated at random points in range
+    rng = np.random.RandomState(0)
+    errors = {}
+    for name, (coefficients, lower, upper, argument) in _CHARTS.items():
+        x = rng.uniform(lower, upper, samples)
+        errors[name] = np.max(np.abs(table(name)(x, kind) - charts.polynomial(coefficients, x)))
+    return errors
+
+
+if __name__ == "__main__":
+    import timeit
+
+    for kind in ["cubic", "linear"]:
+        print("Maximum interpolation error (" + kind + "):")
+        for name, error in table_error(kind).items():
+            print("    %-10s %.2e" % (name, error))
+
+    print("Time per call [us]:          polynomial    table")
+    cfc = np.linspace(0.1, 0.4, 10000)
+    cases = [("K", lambda: charts.K(0.3, 1), lambda: K_table(0.3, 1)),
+             ("cldf", lambda: charts.cldf(0.3, 0.12), lambda: cldf_table(0.3, 0.12)),
+             ("Kprime", lambda: charts.Kprime(45, 0.3), lambda: Kprime_table(45, 0.3)),
+             ("adf", lambda: charts.adf(45, 0.3), lambda: adf_table(45, 0.3)),
+             ("cldelta", lambda: charts.cldelta(0.3), lambda: cldelta_table(0.3)),
+             ("K, 1e4 values", lambda: charts.K_array(cfc, 1), lambda: K_table(cfc, 1)),
+             ("adf, 1e4 values", lambda: charts.adf_array(45, cfc), lambda: adf_table(45, cfc))]
+    for name, polynomial, tabulated in cases:
+        tabulated()
+        n = 2000
+        print("    %-22s %10.2f %10.2f" % (name, timeit.timeit(polynomial, number=n)/n*1e6,
+                                           timeit.timeit(tabulated, number=n)/n*1e6))
@@ -0,0 +1,55 @@
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+from contextlib import contextmanager
+
+# Every evaluation of a Model gets a JobContext: data paths ("airfoils", "planforms", "pdf_out", "program_files") are
+# resolved against its project root instead of the current directory, and the files the solvers write go to its own
+# scratch directory. The current directory belongs to the whole process, so the wrappers that can only work in it
+# (kbeutils.avl, parapy.lib.xfoil) run under a lock in the scratch directory, see working_directory. Separate
+# processes each have their own current directory and do not wait for each other.
+
+project_directory = os.path.dirname(os.path.abspath(__file__))
+
+solver_lock = threading.RLock()
+
+
+class JobContext:
+    def __init__(self, project_root=project_directory):
+        self.project_root = os.path.abspath(project_root)
+        self.scratch = tempfile.mkdtemp(prefix="job_")
+        self.finalizer = weakref.finalize(self, shutil.rmtree, self.scratch, True)  # removed with the context
+
+    def path(self, *parts):     # data path relative to the project root, absolute paths are left as they are
+        return os.path.join(self.project_root, *parts)
+
+    def remove(self):
+        self.finalizer()
+
+
+def project_path(project_root, *parts):
+    return os.path.join(project_directory if project_root is None else project_root, *parts)
+
+
+@contextmanager
+def working_directory(path):
+    # Runs the block in path, holding the lock so that no other thread changes the directory in between
+    with solver_lock:
+        cwd = os.getcwd()
+        os.chdir(path)
+        try:
+            yield path
+        finally:
+            os.chdir(cwd)
+
+
+@contextmanager
+def scratch_directory(parent=None, prefix="run_"):
+    # A fresh directory inside parent (the job scratch directory) for one solver run, removed afterwards
+    path = tempfile.mkdtemp(prefix=prefix, dir=parent)
+    try:
+        yield path
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
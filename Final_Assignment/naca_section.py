@@ -0,0 +1,97 @@
+import numpy as np
+
+# Sections for the XFOIL stations computed directly from the NACA equations, without the geometry kernel. The lofted
+# surface between two sections is ruled, so the cut at a span fraction is the same blend of the two section curves.
+# All point arrays run from the trailing edge over the top to the leading edge and back over the bottom.
+
+# camber line constants of the 5 digit airfoils for a design lift coefficient of 0.3: P: (m, k1), reflexed P: (m, k1, k2/k1)
+_NACA5 = {1: (0.0580, 361.4), 2: (0.1260, 51.64), 3: (0.2025, 15.957), 4: (0.2900, 6.643), 5: (0.3910, 3.230)}
+_NACA5_REFLEX = {2: (0.1300, 51.99, 0.000764), 3: (0.2170, 15.793, 0.00677), 4: (0.3180, 6.520, 0.0303),
+                 5: (0.4410, 3.191, 0.1355)}
+
+
+def thickness(x, t, closed_te=False):
+    return 5*t*(0.2969*np.sqrt(x) - 0.1260*x - 0.3516*x**2 + 0.2843*x**3 - (0.1036 if closed_te else 0.1015)*x**4)
+
+
+def camber_line(designation, x):
+    # Camber and its slope
+    if len(designation) == 4:
+        m, p = int(designation[0])/100, int(designation[1])/10
+        if m == 0 or p == 0:
+            return np.zeros_like(x), np.zeros_like(x)
+        front = x < p
+        yc = np.where(front, m/p**2*(2*p*x - x**2), m/(1 - p)**2*(1 - 2*p + 2*p*x - x**2))
+        dyc = np.where(front, 2*m/p**2*(p - x), 2*m/(1 - p)**2*(p - x))
+        return yc, dyc
+    scale = int(designation[0])*3/20/0.3     # design lift coefficient relative to that of the table
+    p, reflex = int(designation[1]), int(designation[2])
+    front = x < 0
+    if reflex == 0 and p in _NACA5:
+        m, k1 = _NACA5[p]
+        front = x < m
+        yc = np.where(front, k1/6*(x**3 - 3*m*x**2 + m**2*(3 - m)*x), k1*m**3/6*(1 - x))
+        dyc = np.where(front, k1/6*(3*x**2 - 6*m*x + m**2*(3 - m)), -k1*m**3/6)
+    elif reflex == 1 and p in _NACA5_REFLEX:
+        m, k1, k21 = _NACA5_REFLEX[p]
+        front = x < m
+        yc = np.where(front, k1/6*((x - m)**3 - k21*(1 - m)**3*x - m**3*x + m**3),
+                      k1/6*(k21*(x - m)**3 - k21*(1 - m)**3*x - m**3*x + m**3))
+        dyc = np.where(front, k1/6*(3*(x - m)**2 - k21*(1 - m)**3 - m**3),
+                       k1/6*(3*k21*(x - m)**2 - k21*(1 - m)**3 - m**3))
+    else:
+        raise ValueError("NACA " + designation + " is not a standard 5 digit airfoil")
+    return scale*yc, scale*dyc
+
+
+def naca_points(designation, n_points=81, closed_te=False):
+    # Unit chord airfoil as (x, z) points with cosine spacing, n_points on each surface
+    if len(designation) not in (4, 5) or not designation.isdigit():
+        raise ValueError("NACA " + designation + " is not a 4 or 5 digit designation")
+    x = (1 - np.cos(np.linspace(0, np.pi, n_points)))/2
+    yt = thickness(x, int(designation[-2:])/100, closed_te)
+    yc, dyc = camber_line(designation, x)
+    theta = np.arctan(dyc)
+    top = np.column_stack([x - yt*np.sin(theta), yc + yt*np.cos(theta)])
+    bottom = np.column_stack([x + yt*np.sin(theta), yc - yt*np.cos(theta)])
+    return np.vstack([top[::-1], bottom[1:]])
+
+
+def section_curve(designation, chord, origin, vx, vz, n_points=81):
+    # Points in space of an airfoil with its leading edge at origin and its chord along vx, like Section.curve
+    unit = naca_points(designation, n_points)
+    return np.asarray(origin) + chord*(unit[:, :1]*np.asarray(vx) + unit[:, 1:]*np.asarray(vz))
+
+
+def normalized_section(points, vx, vz):
+    # Projects the points on the plane of vx and vz and scales them to a unit chord along x, with the leading edge in
+    # the origin, as airfoil_points_in_xy_plane does for the section curves
+    xy = np.column_stack([points @ np.asarray(vx), points @ np.asarray(vz)])
+    te = (xy[0] + xy[-1])/2
+    le = xy[np.argmax(np.linalg.norm(xy - te, axis=1))]
+    chord = te - le
+    length = np.linalg.norm(chord)
+    cos, sin = chord/length
+    xy = (xy - le) @ np.array([[cos, -sin], [sin, cos]])/length
+    i_le = np.argmin(xy[:, 0])
+    if np.mean(xy[:i_le+1, 1]) < np.mean(xy[i_le:, 1]):    # the top surface has to come first
+        xy = xy[::-1]
+    return xy
+
+
+def blended_section(root, tip, fraction, vx, vz, n_points=81):
+    # Normalized XFOIL points of the cut at fraction of the way from root to tip through a loft of the two sections.
+    # root and tip are (designation, chord, origin, vx, vz) of the section frames, vx and vz span the cutting plane
+    root_points = section_curve(*root, n_points=n_points)
+    tip_points = section_curve(*tip, n_points=n_points)
+    return normalized_section((1 - fraction)*root_points + fraction*tip_points, vx, vz)
+
+
+if __name__ == "__main__":
+    twist = np.radians(-3)
+    root = ("2412", 5.0, [0, 0, 0], [1, 0, 0], [0, 0, 1])
+    tip = ("2412", 3.0, [1.0, 8.0, 0.4], [np.cos(twist), 0, -np.sin(twist)], [np.sin(twist), 0, np.cos(twist)])
+    for fraction in [0, 0.5, 0.95]:
+        points = blended_section(root, tip, fraction, [1, 0, 0], [0, 0, 1])
+        print("fraction %.2f: max deviation from the NACA 2412 %.1e" %
+              (fraction, np.max(np.abs(points - naca_points("2412")))))
@@ -0,0 +1,75 @@
+import hashlib
+import json
+import os
+
+
+def polar_key(points, reynolds_number, mach, alpha, mode="run_xfoil"):
+    # Content address of an xfoil run: the section points are rounded so that round-off noise from the CAD kernel
+    # does not create new entries. mode names the back end and its settings (iterations, ...), so that runs which
+    # can converge differently do not share entries
+    data = ";".join("%.9f,%.9f" % (p[0], p[1]) for p in points)
+    data += "|%.6f|%.6f|" % (reynolds_number, mach) + ",".join(repr(float(a)) for a in alpha) + "|" + mode
+    return hashlib.sha1(data.encode()).hexdigest()
+
+
+class PolarCache:
+    # Polars are stored as one json file per key, the file modification time is used as last access time so the
+    # least recently used polars are deleted first when the cache grows beyond max_bytes
+    def __init__(self, directory, max_bytes=20e6):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def file(self, key):
+        return os.path.join(self.directory, key + ".json")
+
+    def get(self, key):
+        try:
+            with open(self.file(key)) as f:
+                columns = json.load(f)
+            os.utime(self.file(key))
+        except (OSError, ValueError):
+            return None
+        return columns
+
+    def put(self, key, columns):
+        self.store(key, [[float(v) for v in row] for row in columns])
+
+    def store(self, key, data):     # any json data under key, put stores polar columns
+        os.makedirs(self.directory, exist_ok=True)
+        temp = self.file(key) + ".%d.tmp" % os.getpid()
+        try:
+            with open(temp, "w") as f:
+                json.dump(data, f)
+            os.replace(temp, self.file(key))
+        finally:
+            if os.path.exists(temp):
+                os.remove(temp)
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                try:
+                    stat = os.stat(os.path.join(self.directory, name))
+                except OSError:     # removed by another process in the meantime
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(e[1] for e in entries)
+        for mtime, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self):
+        if os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                if name.endswith(".json"):
+                    os.remove(os.path.join(self.directory, name))
+
+
+polar_cache = PolarCache(os.path.join(os.path.dirname(os.path.abspath(__file__)), "polar_cache"))
@@ -1,4 +1,6 @@
-from airfoil import get_airfoil
+from airfoil import load_airfoil
+from airfoil_library import airfoil_library
+from job_context import project_path
 from parapy.geom import Point
 from tkinter import Tk, mainloop, X, messagebox
 import warnings
@@ -25,13 +27,14 @@ def get_line(f, number=True):
 
 
 class get_input:
-    def __init__(self, name):
-        exception = False
+    def __init__(self, name, warn=None, project_root=None):
+        warn = error if warn is None else warn  # warn(msg) reports problems, a popup by default
+        exception = False   # relative file names are found in project_root, the project folder by default
         try:
-            f = open(name)
+            f = open(project_path(project_root, name))
         except:
-            error("Planform file with specified name does not exist. Default planform was loaded instead.")
-            f = open("program_files/default_planform.txt")
+            warn("Planform file with specified name does not exist. Default planform was loaded instead.")
+            f = open(project_path(project_root, "program_files", "default_planform.txt"))
             exception = True
 
         self.wing_span = get_line(f)
@@ -60,15 +63,14 @@ class get_input:
             self.colour = "yellow"
             self.valid = True
 
-        coords = get_airfoil(self.airfoil_name)
-        self.airfoil_coordinates = []
-        for i in range(len(coords[0])):
-            self.airfoil_coordinates.append(Point(coords[0][i], 0, coords[1][i]))
+        self.airfoil_points = load_airfoil(self.airfoil_name, project_path(project_root, "airfoils"))
+        self.airfoil_coordinates = [Point(x, 0, y) for x, y in self.airfoil_points]
 
 
-def check_input(out, name):
-    minimum = get_input("program_files/planform_min_values.txt")
-    maximum = get_input("program_files/planform_max_values.txt")
+def check_input(out, name, warn=None, project_root=None):
+    warn = error if warn is None else warn
+    minimum = get_input("program_files/planform_min_values.txt", warn, project_root)
+    maximum = get_input("program_files/planform_max_values.txt", warn, project_root)
     parameters = list(out.__dict__.keys())
     for parm in parameters[0:parameters.index("speed")+1]:
         if not minimum.__getattribute__(parm) <= out.__getattribute__(parm) <= maximum.__getattribute__(parm):
@@ -84,7 +86,9 @@ def check_input(out, name):
     if out.wing_span - out.flap_gap - out.fuselage_radius < 1:
         out.valid = False
         warnings.warn("The wing contains less than 1 m of span available for HLDs which is not allowed.")
-    if len(out.airfoil_coordinates) < 50:
+    properties = airfoil_library(project_path(project_root, "airfoils")).get(out.airfoil_name)
+    n_points = len(out.airfoil_points) if properties is None else properties["points"]  # not indexed: count them
+    if n_points < 50:
         warnings.warn("Airfoil coordinates file does not contain at least 50 points which is the minimum required amount.")
         out.valid = False
     if out.wing_span*out.outer_flap_lim < out.kink_position + out.flap_gap + 0.5:
@@ -92,10 +96,10 @@ def check_input(out, name):
         out.valid = False
 
     if not out.valid:
-        out = get_input("program_files/default_planform.txt")
+        out = get_input("program_files/default_planform.txt", warn, project_root)
         out.colour = "red"
         warnings.warn("Default planform file was loaded instead of '" + name + "'.")
-        error("One or more planform inputs are invalid, check console for more details. Default planform parameters were loaded instead of ones specified in requested file")
+        warn("One or more planform inputs are invalid, check console for more details. Default planform parameters were loaded instead of ones specified in requested file")
     return out
 
 
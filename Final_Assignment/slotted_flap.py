@@ -1,6 +1,6 @@
 from parapy.geom import *
 from parapy.core import *
-from functions import p2v, v2p, interp_coords, split_coordinates, hinge_position
+from functions import p2v, v2p, hinge_position
 from wing_section import Wing_base
 import numpy as np
 
@@ -27,11 +27,10 @@ class Slotted_flap_section(Wing_base):
 
     @Attribute
     def upper_points(self):
-        xb, zb, xt, zt = split_coordinates(self.airfoil_coordinates)
         points_1, points_2, points_3 = [], [], []
         x_1 = self.flap_hinge_location + 0.5 * self.hinge_dimension[1]
         x_2 = x_1 + 0.001
-        z_1, z_2 = interp_coords(xt, zt, x_1), interp_coords(xt, zt, x_2)
+        z_1, z_2 = self.surface.top([x_1, x_2])
         for i in range(2):
             points_1.append(self.points[i] + Vector(x_1, 0, z_1+0.001)*self.chords[i])
             points_2.append(self.points[i] + Vector(x_2, 0, z_2+0.001)*self.chords[i])
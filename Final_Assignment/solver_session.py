@@ -0,0 +1,130 @@
+import atexit
+import os
+import queue
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+from multiprocessing.util import Finalize
+
+# Long-lived command line solver processes (AVL, XFOIL) driven through their command stream. A reader thread collects
+# everything the solver prints; expect() waits until the output matches a pattern, usually the next prompt, and returns
+# the output up to it. Prompts are not followed by a newline, so the output is read in chunks instead of lines.
+
+
+class SessionError(RuntimeError):
+    pass
+
+
+class SolverSession:
+    prompt = r"c>\s*$"      # the solver waits for a command
+
+    def __init__(self, command, cwd=None, timeout=60):
+        self.command_line = [command] if isinstance(command, str) else list(command)
+        self.own_cwd = cwd is None      # without cwd every session gets its own scratch directory
+        self.cwd = tempfile.mkdtemp(prefix="session_") if cwd is None else cwd
+        self.timeout = timeout
+        self.process = None
+        self.output = None
+        self.buffer = ""
+
+    @property
+    def alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def start(self):
+        self.process = subprocess.Popen(self.command_line, cwd=self.cwd, stdin=subprocess.PIPE,
+                                        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, bufsize=0)
+        self.output = queue.Queue()
+        self.buffer = ""
+        threading.Thread(target=self.read, args=(self.process.stdout, self.output), daemon=True).start()
+
+    @staticmethod
+    def read(stream, output):   # runs in the reader thread until the solver closes its output
+        while True:
+            try:
+                chunk = os.read(stream.fileno(), 65536)
+            except OSError:
+                chunk = b""
+            output.put(chunk.decode(errors="replace") if chunk else None)
+            if not chunk:
+                stream.close()
+                return
+
+    def send(self, *lines):
+        if not self.alive:
+            raise SessionError(self.command_line[-1] + " is not running")
+        try:
+            self.process.stdin.write("".join(line + "\n" for line in lines).encode())
+            self.process.stdin.flush()
+        except OSError as e:
+            raise SessionError(self.command_line[-1] + " stopped reading commands: " + str(e))
+
+    def expect(self, pattern=None, timeout=None):
+        # Output up to and including the first match of pattern (the prompt by default), the rest stays buffered
+        pattern = re.compile(self.prompt if pattern is None else pattern, re.MULTILINE)
+        timeout = self.timeout if timeout is None else timeout
+        while True:
+            match = pattern.search(self.buffer)
+            if match:
+                out, self.buffer = self.buffer[:match.end()], self.buffer[match.end():]
+                return out
+            try:
+                chunk = self.output.get(timeout=timeout)
+            except queue.Empty:
+                self.close()
+                raise SessionError(self.command_line[-1] + " gave no answer within %g s" % timeout)
+            if chunk is None:
+                self.close()
+                raise SessionError(self.command_line[-1] + " stopped, last output:\n" + self.buffer[-2000:])
+            self.buffer += chunk
+
+    def run(self, *lines, pattern=None, timeout=None):     # sends commands and waits for the next prompt
+        self.send(*lines)
+        return self.expect(pattern, timeout)
+
+    def close(self):
+        if self.process is not None:
+            if self.process.poll() is None:
+                self.process.kill()
+            self.process.wait()
+            self.process.stdin.close()
+            self.process = None
+
+    def remove(self):   # closes the session and removes its scratch directory
+        self.close()
+        if self.own_cwd:
+            shutil.rmtree(self.cwd, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.remove()
+
+
+_local = threading.local()
+_started = []
+
+
+def pooled(name, factory):
+    # The session called name of this process and thread, made by factory() on first use. Every worker of a pool
+    # thereby keeps its own solver processes. atexit does not run in the workers of a process pool, so the sessions
+    # are removed by a multiprocessing finalizer, which does. Forked processes do not take over the sessions of
+    # their parent
+    sessions = _local.__dict__.setdefault("sessions", {})
+    key = (name, os.getpid())
+    if key not in sessions:
+        if not any(pid == os.getpid() for pid, session in _started):
+            Finalize(None, _remove_sessions, exitpriority=10)
+        sessions[key] = factory()
+        _started.append((os.getpid(), sessions[key]))
+    return sessions[key]
+
+
+@atexit.register
+def _remove_sessions():
+    for pid, session in _started:
+        if pid == os.getpid():
+            session.remove()
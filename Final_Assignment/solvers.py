@@ -0,0 +1,37 @@
+from math import copysign
+
+
+def bracketed_root(f, a, b, fa=None, fb=None, tol=1e-6, method="secant", max_iter=100):
+    # Shrinks the bracket [a, b], over which f changes sign, until it is smaller than tol. Returns the final bracket
+    # (a, b) with f(a) on the same side of zero as the original f(a).
+    # method "bisection" halves the bracket every step. method "secant" takes the regula falsi point and then probes
+    # tol/2 beyond it, which closes the bracket in one or two steps for the (piecewise) linear functions found in
+    # this program
+    fa = f(a) if fa is None else fa
+    fb = f(b) if fb is None else fb
+    if (fa > 0) == (fb > 0):
+        raise ValueError("The root is not bracketed: f(%g) = %g and f(%g) = %g" % (a, fa, b, fb))
+
+    for i in range(max_iter):
+        if abs(b - a) <= tol:
+            break
+        if method == "bisection" or fb == fa:
+            c = (a + b)/2
+        else:
+            c = b - fb*(b - a)/(fb - fa)
+            c = min(max(c, min(a, b) + tol/4), max(a, b) - tol/4)    # keep the new point inside the bracket
+        fc = f(c)
+        if (fc > 0) == (fb > 0):
+            b, fb = c, fc
+            far = a
+        else:
+            a, fa = c, fc
+            far = b
+        probe = c + copysign(tol/2, far - c)
+        if method != "bisection" and abs(b - a) > tol and min(a, b) < probe < max(a, b):
+            fp = f(probe)
+            if (fp > 0) == (fb > 0):
+                b, fb = probe, fp
+            else:
+                a, fa = probe, fp
+    return a, b
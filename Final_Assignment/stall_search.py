@@ -0,0 +1,178 @@
+import numpy as np
+from solvers import bracketed_root
+
+
+# The functions in this file find the first angle of attack at which a strip of the wing stalls. evaluate(alpha) must
+# return the total lift coefficient of the wing and the lift coefficients of the strips at that angle of attack,
+# sweep(alphas) the same for an array of angles of attack (one row of strip lift coefficients per angle).
+# All functions return the lift coefficient at stall and the sampled lift curve (lift coefficients and angles of
+# attack, sorted by angle). The searches give up with a ValueError when no strip has stalled at max_alpha, or when
+# the section clmax of a strip is unknown (NaN, xfoil did not converge).
+
+
+def stall_margin(clnorm, clmaxfoil):
+    # Positive as soon as any strip exceeds the maximum lift coefficient of its section
+    return np.max(np.asarray(clnorm) - np.asarray(clmaxfoil))
+
+
+def section_clmax(clmaxfoil):
+    clmaxfoil = np.asarray(clmaxfoil, dtype=float)
+    unknown = np.nonzero(np.isnan(clmaxfoil))[0]
+    if len(unknown) > 0:
+        raise ValueError("No section clmax for the strips at stations %s, xfoil did not converge there"
+                         % unknown.tolist())
+    return clmaxfoil
+
+
+def not_stalled(max_alpha):
+    return ValueError("No strip reaches the clmax of its section up to %g deg angle of attack" % max_alpha)
+
+
+def lift_curve(samples):
+    alphas = sorted(samples)
+    return [samples[a][0] for a in alphas], alphas
+
+
+def step_search(evaluate, clmaxfoil, start=0, step=0.5, max_alpha=40):
+    # Original method: increase the angle of attack in steps until a strip stalls
+    clmaxfoil = section_clmax(clmaxfoil)
+    samples = {}
+    aoa = start
+    while aoa <= max_alpha:
+        samples[aoa] = evaluate(aoa)
+        if stall_margin(samples[aoa][1], clmaxfoil) > 0:
+            break
+        aoa = aoa + step
+    else:
+        raise not_stalled(max_alpha)
+    cltot, alphas = lift_curve(samples)
+    return samples[alphas[-1]][0], cltot, alphas
+
+
+def bracket_search(evaluate, clmaxfoil, start=0, step=4, tol=0.05, method="secant", max_alpha=40):
+    # Brackets the stall angle with large steps and refines the bracket down to tol degrees. The lift coefficient
+    # is reported at the upper end of the bracket, the first stalled angle found, like step_search does.
+    clmaxfoil = section_clmax(clmaxfoil)
+    samples = {}
+
+    def margin(aoa):
+        samples[aoa] = evaluate(aoa)
+        return stall_margin(samples[aoa][1], clmaxfoil)
+
+    lower, upper = start, start
+    m_lower = m_upper = margin(start)
+    while m_upper <= 0 and upper < max_alpha:
+        lower, m_lower = upper, m_upper
+        upper = min(upper + step, max_alpha)
+        m_upper = margin(upper)
+
+    if m_upper <= 0:
+        raise not_stalled(max_alpha)
+    if upper > lower:
+        lower, upper = bracketed_root(margin, lower, upper, m_lower, m_upper, tol=tol, method=method)
+    cltot, alphas = lift_curve(samples)
+    return samples[upper][0], cltot, alphas
+
+
+def sweep_search(sweep, clmaxfoil, start=0, step=0.5, batch=40, max_alpha=40):
+    # Same angles of attack as step_search, but evaluated batch angles at a time and checked for stall as arrays
+    clmaxfoil = section_clmax(clmaxfoil)
+    cltot, alphas = [], []
+    aoa = start
+    while aoa <= max_alpha:
+        batch_alphas = aoa + step*np.arange(batch)
+        batch_alphas = batch_alphas[batch_alphas <= max_alpha]
+        cl, clnorm = sweep(batch_alphas)
+        stalled = np.nonzero(np.any(np.asarray(clnorm) > np.asarray(clmaxfoil), axis=1))[0]
+        n = stalled[0] + 1 if len(stalled) > 0 else len(batch_alphas)
+        cltot += list(cl[:n])
+        alphas += list(batch_alphas[:n])
+        if len(stalled) > 0:
+            break
+        aoa = batch_alphas[-1] + step
+    else:
+        raise not_stalled(max_alpha)
+    return cltot[-1], cltot, alphas
+
+
+def affine_model(sweep, alphas=(0, 5)):
+    # AVL is linear in the angle of attack, so two angles define CLtot and every strip lift coefficient at any angle:
+    # cl(alpha) = cl0 + cl_alpha*alpha. Returns cl0 and cl_alpha of the wing and arrays of them for the strips
+    alphas = np.array(alphas, dtype=float)
+    cl, clnorm = sweep(alphas)
+    cl, clnorm = np.asarray(cl), np.asarray(clnorm)
+    da = alphas[1] - alphas[0]
+    cl_alpha = (cl[1] - cl[0])/da
+    strip_alpha = (clnorm[1] - clnorm[0])/da
+    return cl[0] - cl_alpha*alphas[0], cl_alpha, clnorm[0] - strip_alpha*alphas[0], strip_alpha
+
+
+def linear_search(sweep, clmaxfoil, alphas=(0, 5), verify=True, tol=0.01):
+    # Solves the affine strip model for the first angle at which a strip reaches its clmax. With verify the wing is
+    # analysed once more at that angle and the lift coefficient of that run is reported. If the strip closest to its
+    # clmax is more than tol away from it in that run, the strips are not affine in the angle of attack and
+    # bracket_search finds the stall angle instead
+    clmaxfoil = section_clmax(clmaxfoil)
+    cl0, cl_alpha, strip_cl0, strip_alpha = affine_model(sweep, alphas)
+    lifting = strip_alpha > 0
+    if not np.any(lifting):
+        raise ValueError("None of the strips gains lift with angle of attack, no stall angle can be found")
+    stall_alpha = float(np.min((np.asarray(clmaxfoil)[lifting] - strip_cl0[lifting])/strip_alpha[lifting]))
+    samples = {float(a): (cl0 + cl_alpha*a, None) for a in alphas}
+    samples[stall_alpha] = (cl0 + cl_alpha*stall_alpha, None)
+    if verify:
+        cl, clnorm = sweep(np.array([stall_alpha]))
+        if abs(stall_margin(np.asarray(clnorm)[0], clmaxfoil)) > tol:
+            return bracket_search(lambda aoa: tuple(result[0] for result in sweep(np.array([aoa]))), clmaxfoil)
+        samples[stall_alpha] = (float(cl[0]), None)
+    cltot, sampled_alphas = lift_curve(samples)
+    return samples[stall_alpha][0], cltot, sampled_alphas
+
+
+def stall_angles(clmaxfoil, strip_cl0, strip_alpha):
+    # Angle of attack at which each strip of the affine model reaches its clmax, infinite for strips without lift slope
+    lifting = strip_alpha > 0
+    angles = np.full(len(strip_alpha), np.inf)
+    angles[lifting] = (np.asarray(clmaxfoil)[lifting] - strip_cl0[lifting])/strip_alpha[lifting]
+    return angles
+
+
+def adaptive_clmax(clmax_at, strip_cl0, strip_alpha, coarse=5, tol=0.1):
+    # Section clmax of all strips from as few stations as possible. clmax_at(stations) returns the clmax of a list of
+    # station (strip) indices. Starting from coarse equally spaced stations and interpolating in between, stations are
+    # added only next to the strip that stalls first in the affine model, until that strip is analysed and its stall
+    # angle changes less than tol degrees or nothing is left to refine. Stations where xfoil did not converge (NaN)
+    # are left out of the interpolation. Returns the clmax of all strips and the stations used
+    n = len(strip_alpha)
+    known = {}
+
+    def analyse(stations):
+        stations = [j for j in stations if j not in known]
+        if stations:
+            known.update(zip(stations, clmax_at(stations)))
+        return len(stations)
+
+    def interpolated():
+        stations = [j for j in sorted(known) if not np.isnan(known[j])]
+        if not stations:
+            raise ValueError("xfoil did not converge at any of the stations %s" % sorted(known))
+        return np.interp(np.arange(n), stations, [known[j] for j in stations])
+
+    analyse(sorted(set(np.round(np.linspace(0, n - 1, coarse)).astype(int).tolist())))
+    previous = np.inf
+    while True:
+        angles = stall_angles(interpolated(), strip_cl0, strip_alpha)
+        critical = int(np.argmin(angles))
+        if critical in known and abs(angles[critical] - previous) <= tol:
+            break
+        previous = angles[critical]
+        if critical in known:   # refine halfway to the analysed neighbours
+            below = [j for j in known if j < critical]
+            above = [j for j in known if j > critical]
+            refine = [(critical + max(below))//2 if below else critical,
+                      (critical + min(above) + 1)//2 if above else critical]
+        else:
+            refine = [critical]
+        if analyse(refine) == 0:
+            break
+    return interpolated(), sorted(known)
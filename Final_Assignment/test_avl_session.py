@@ -0,0 +1,73 @@
+import os
+import sys
+import unittest
+import numpy as np
+from avl_session import AvlSession, avl_geometry
+from solver_session import SessionError
+
+# AvlSession against fake_avl.py, which stands in for AVL. Run with
+#     python -m unittest test_avl_session
+
+fake_avl = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_avl.py")]
+
+
+def wing(mach=0.2):
+    return avl_geometry("wing", mach, 90, 3.5, 15, "2412", [(0, 0, 0, 5, 0), (1, 6, 0.3, 3.5, -1),
+                                                          (3, 15, 0.8, 2, -3)])
+
+
+class TestAvlSession(unittest.TestCase):
+    def setUp(self):
+        self.session = AvlSession(fake_avl, timeout=10)
+
+    def tearDown(self):
+        self.session.remove()
+
+    def test_point(self):
+        cltot, cl_norm = self.session.point(wing(), 2)
+        beta = (1 - 0.2**2)**-0.5
+        self.assertAlmostEqual(cltot, beta*(0.25 + 0.09*2), places=4)
+        self.assertEqual(len(cl_norm), 20)
+        self.assertTrue(np.all(np.diff(cl_norm) > 0))    # the fake loads the strips more towards the tip
+
+    def test_sweep(self):
+        alphas = [0, 2, 4]
+        cltot, cl_norm = self.session.sweep(wing(), alphas)
+        self.assertEqual(cl_norm.shape, (3, 20))
+        for alpha, cl in zip(alphas, cltot):
+            self.assertAlmostEqual(cl, self.session.point(wing(), alpha)[0], places=5)
+
+    def test_new_case_reuses_process(self):
+        self.session.point(wing(), 0)
+        process = self.session.process
+        self.session.point(wing(), 6)
+        self.session.sweep(wing(), [1, 3])
+        self.assertIs(self.session.process, process)
+        self.assertTrue(self.session.alive)
+
+    def test_new_geometry_restarts_process(self):
+        low, _ = self.session.point(wing(0.2), 6)
+        process = self.session.process
+        high, _ = self.session.point(wing(0.5), 6)
+        self.assertIsNot(self.session.process, process)
+        self.assertIsNotNone(process.poll())    # the old AVL has ended
+        self.assertGreater(high, low)   # the new geometry has been loaded, the fake scales with the Mach number
+
+    def test_timeout_kills_process(self):
+        session = AvlSession(fake_avl + ["--hang"], timeout=1)
+        try:
+            session.load(wing())
+            process = session.process
+            with self.assertRaises(SessionError):
+                session.point(wing(), 2)
+            self.assertIsNotNone(process.poll())
+            self.assertFalse(session.alive)
+            with self.assertRaises(SessionError):   # the next case starts a new AVL, which hangs as well
+                session.point(wing(), 2)
+            self.assertIsNot(session.process, process)
+        finally:
+            session.remove()
+
+
+if __name__ == "__main__":
+    unittest.main()
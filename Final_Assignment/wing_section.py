@@ -1,24 +1,55 @@
 from parapy.geom import *
 from parapy.core import *
-from functions import p2v, interp_coords, split_coordinates
+from functions import p2v, airfoil_surface
 import numpy as np
 
 
+class AirfoilCurves:
+    # Per model cache of airfoil curves: the unit airfoil is fitted once and scaled, translated copies are handed out,
+    # so neighbouring sections also share the airfoil curve at their common end
+    def __init__(self, airfoil_coordinates):
+        self.airfoil_coordinates = airfoil_coordinates
+        self.unit_airfoil = None
+        self.placed = {}
+
+    def unit(self):
+        if self.unit_airfoil is None:
+            self.unit_airfoil = FittedCurve(self.airfoil_coordinates)
+        return self.unit_airfoil
+
+    def airfoil(self, chord, point):
+        key = (round(chord, 9), round(point[0], 9), round(point[1], 9), round(point[2], 9))
+        if key not in self.placed:
+            scaled_airfoil = ScaledCurve(self.unit(), factor=chord, reference_point=Point(0, 0, 0))
+            self.placed[key] = TranslatedCurve(scaled_airfoil, p2v(point))
+        return self.placed[key]
+
+
 class Wing_base(Base):
     chords = Input(settable=False)
     points = Input(settable=False)
     airfoil_coordinates = Input(settable=False)
+    airfoil_curves = Input(None, settable=False)    # AirfoilCurves shared by all sections of a wing
     flap_hinge_location = Input(0.67, settable=False)
-    flap_deflection = Input(0, settable=False)
+    flap_deflection = Input(0)  # only the flap Part depends on it, the split solids are kept for the hinge location
 
     @Attribute                  # Interpolation of airfoil coordinates
     def unit_airfoil(self):
+        if self.airfoil_curves is not None:
+            return self.airfoil_curves.unit()
         return FittedCurve(self.airfoil_coordinates)
 
+    @Attribute                  # Top and bottom surface of the airfoil for interpolation of coordinates
+    def surface(self):
+        return airfoil_surface(self.airfoil_coordinates)
+
     @Attribute                  # Returns root and tip airfoil of the given wing section
     def airfoils(self):
         out = [0, 0]
         for i in range(2):
+            if self.airfoil_curves is not None:
+                out[i] = self.airfoil_curves.airfoil(self.chords[i], self.points[i])
+                continue
             scaled_airfoil = ScaledCurve(self.unit_airfoil, factor=self.chords[i], reference_point=Point(0, 0, 0))
             out[i] = TranslatedCurve(scaled_airfoil, p2v(self.points[i]))
         return out
@@ -31,9 +62,8 @@ class Wing_base(Base):
     # interpolating airfoil coordinates
     @Attribute
     def hinge_dimension(self):
-        xb, zb, xt, zt = split_coordinates(self.airfoil_coordinates)
-        z_bottom = interp_coords(xb, zb, self.flap_hinge_location)
-        z_top = interp_coords(xt, zt, self.flap_hinge_location)
+        z_bottom = self.surface.bottom(self.flap_hinge_location)
+        z_top = self.surface.top(self.flap_hinge_location)
         return (z_top + z_bottom) / 2, (z_top - z_bottom)*1.01
 
     @Attribute                  # Returns the sweep of the hinge line of flaps
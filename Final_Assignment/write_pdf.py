@@ -1,6 +1,8 @@
 from fpdf import FPDF
 from read_input import get_input
 import datetime
+import os
+from job_context import project_path
 
 
 def write_list(pdf, title, position, names, values, units):
@@ -17,7 +19,8 @@ def write_list(pdf, title, position, names, values, units):
         pdf.cell(200, 6, txt=value, ln=1, align='L')
 
 
-def write_pdf(inp, cl_max_airfoil, Delta_cl_max, flap_hinge_location, planform_file_name, flap_deflection):
+def write_pdf(inp, cl_max_airfoil, Delta_cl_max, flap_hinge_location, planform_file_name, flap_deflection,
+              directory=project_path(None, "pdf_out")):
     pdf = FPDF()
     pdf.add_page()
 
@@ -55,7 +58,7 @@ def write_pdf(inp, cl_max_airfoil, Delta_cl_max, flap_hinge_location, planform_f
     units = ["", "", "x/c", "deg"]
     write_list(pdf, "Output parameters:", (110, list_y), names, values, units)
 
-    pdf.output("pdf_out/"+planform_file_name+"_"+str(datetime.datetime.today())[:10]+".pdf")
+    pdf.output(os.path.join(directory, planform_file_name+"_"+str(datetime.datetime.today())[:10]+".pdf"))
 
 
 if __name__ == "__main__":
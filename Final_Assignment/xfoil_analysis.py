@@ -4,6 +4,11 @@ from parapy.lib.xfoil import *
 import numpy as np
 import matplotlib.pyplot as plt
 from kbeutils.geom.curve import airfoil_points_in_xy_plane
+from concurrent.futures import ProcessPoolExecutor
+from polar_cache import polar_cache, polar_key
+from naca_section import blended_section
+from xfoil_session import XfoilSession, xfoil_session, default_iterations
+from job_context import scratch_directory, working_directory
 
 
 class XfoilAnalysis(GeomBase):
@@ -15,6 +20,12 @@ class XfoilAnalysis(GeomBase):
     root_section = Input()
     tip_section = Input()
     mach = Input()
+    use_cache = Input(True)  # reuse polars from earlier runs with the same section, Reynolds number, Mach and alpha
+    analytic = Input(False)  # compute the section from the NACA equations instead of cutting lifting_surface
+    session = Input(False)  # run the polar in the XFOIL session of this process instead of a new XFOIL
+    scratch = Input(None)   # directory in which xfoil writes its files, a temporary directory by default
+    adaptive = Input(False)  # march alpha up from zero lift until cl has peaked, one point at a time
+    budget = Input(30)  # seconds a single point of the adaptive march may take before xfoil is killed
     @Attribute
     # the function airfoil_points_in_xy_plane expects a section curve oriented as follow: TE-->top-->LE-->belly-->TE,
     # thus with their normal directed inboard.
@@ -32,22 +43,46 @@ class XfoilAnalysis(GeomBase):
     # in space and tranforms it accordingly.
     # The transformed section has its chord aligned with the x axis and it is normalized (chord length =1)
     def section_points_xfoil(self):
+        if self.analytic and self.flydir:
+            return self.analytic_points
         return airfoil_points_in_xy_plane(self.section_for_analysis)
 
+    @Attribute
+    # The lifting surface is ruled between root_section and tip_section, so the section in flight direction is the
+    # blend of their airfoils at the span fraction, twist included. Only for NACA sections cut in flight direction
+    def analytic_points(self):
+        sections = []
+        for section in [self.root_section, self.tip_section]:
+            position = section.position
+            sections.append((section.airfoil_name, section.chord, xyz(position.point), xyz(position.Vx),
+                             xyz(position.Vz)))
+        frame = self.lifting_surface.position
+        return blended_section(sections[0], sections[1], self.cutting_plane_span_fraction, xyz(frame.Vx),
+                               xyz(frame.Vz))
+
+    @Attribute
+    # Everything a worker process needs to run this station, as plain picklable values
+    def job(self):
+        return ([(p[0], p[1]) for p in self.section_points_xfoil], self.reynolds_number, self.alpha, self.mach,
+                self.use_cache, self.session, self.scratch, self.adaptive, self.budget)
+
+    @Attribute  # polar rows and convergence status, see station_polar
+    def polar(self):
+        return station_polar(*self.job)
+
     @Attribute
     def xfoil_analysis(self):  # refer to Xfoil manual for proper use!
-        return run_xfoil(self.section_points_xfoil,  # run Xfoil analysis
-                         self.reynolds_number,  # this should depend on chord length
-                         self.alpha,
-                         self.mach,# start AoA, end AoA, step
-                         norm=True,  # normalize airfoil if necessary
-                         pane=True,  # smooth out the airfoil
-                         cleanup=True)  # remove files generated by xfoil
+        return self.polar[0]
 
+    @Attribute
+    def convergence(self):
+        return self.polar[1]
 
     @Attribute
     def clmax(self):  # use matplotlib to generate plot
         columns = self.xfoil_analysis
+        if len(columns) == 0:   # not a single converged point
+            return np.nan
         rows = tuple(zip(*columns))  # transpose array generated by xfoil
         cl = rows[1]
         # clmax = np.zeros(len(cl))
@@ -80,3 +115,99 @@ class XfoilAnalysis(GeomBase):
         return IntersectedShapes(shape_in=self.lifting_surface,
                                  tool=self.wing_cutting_plane)
 
+
+def xyz(vector):
+    return np.array([vector[0], vector[1], vector[2]])
+
+
+def xfoil_polar(points, reynolds_number, alpha, mach, use_cache=True, session=False, scratch=None):
+    # run_xfoil writes its files in the current directory, so it runs in a directory of its own inside scratch
+    key = polar_key(points, reynolds_number, mach, alpha,
+                    "session iter%d" % xfoil_session().iterations if session else "run_xfoil")
+    if use_cache:
+        columns = polar_cache.get(key)
+        if columns is not None:
+            return columns
+    if session:
+        columns = xfoil_session().polar(points, reynolds_number, alpha, mach)
+    else:
+        with scratch_directory(scratch, "xfoil_") as directory, working_directory(directory):
+            columns = run_xfoil([Point(x, y, 0) for x, y in points],  # run Xfoil analysis
+                                reynolds_number,  # this should depend on chord length
+                                alpha,  # start AoA, end AoA, step
+                                mach,
+                                norm=True,  # normalize airfoil if necessary
+                                pane=True,  # smooth out the airfoil
+                                cleanup=True)  # remove files generated by xfoil
+    if use_cache:
+        polar_cache.put(key, columns)
+    return columns
+
+
+def station_polar(points, reynolds_number, alpha, mach, use_cache=True, session=False, scratch=None, adaptive=False,
+                  budget=30):
+    # Polar rows of a station and its convergence status. The adaptive march (see XfoilSession.march) runs from the
+    # zero lift angle up to alpha[1] in steps of alpha[2] and stops once cl has peaked, a fixed polar is "converged"
+    # when xfoil returned any point. With session the march runs in the XFOIL session of this process, otherwise in
+    # an XFOIL started for this station in scratch. Killed runs are not cached, they are tried again next time
+    if not adaptive:
+        rows = xfoil_polar(points, reynolds_number, alpha, mach, use_cache, session, scratch)
+        return rows, "converged" if len(rows) > 0 else "failed"
+    iterations = xfoil_session().iterations if session else default_iterations
+    key = polar_key(points, reynolds_number, mach, alpha, "march iter%d budget%g" % (iterations, budget))
+    if use_cache:
+        cached = polar_cache.get(key)
+        if isinstance(cached, dict):
+            return [tuple(row) for row in cached["rows"]], cached["status"]
+    if session:
+        rows, status = xfoil_session().march(points, reynolds_number, mach, alpha[1], alpha[2], budget=budget)
+    else:   # the march needs an interactive xfoil, here one of its own in a directory inside scratch
+        with scratch_directory(scratch, "xfoil_") as directory, XfoilSession(cwd=directory) as xfoil:
+            rows, status = xfoil.march(points, reynolds_number, mach, alpha[1], alpha[2], budget=budget)
+    if use_cache and status != "timeout":
+        polar_cache.store(key, {"rows": [list(row) for row in rows], "status": status})
+    return rows, status
+
+
+def run_station(job):
+    # clmax and convergence status of one station, NaN if no point converged. The files of every xfoil run are kept
+    # in a directory of their own
+    rows, status = station_polar(*job)
+    return (max(row[1] for row in rows) if len(rows) > 0 else np.nan), status
+
+
+def parallel_stations(jobs, stations):
+    # Distributes the stations over a pool of jobs processes, (clmax, status) are returned in station order
+    if jobs <= 1:
+        return [run_station(job) for job in stations]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(run_station, stations))
+
+
+def parallel_clmax(jobs, stations):     # only the clmax values of parallel_stations
+    return np.array([clmax for clmax, status in parallel_stations(jobs, stations)])
+
+
+def fill_unconverged(clmax):
+    # clmax of the stations where xfoil did not converge (NaN) interpolated from the converged stations on either
+    # side, together with the indices of those stations
+    clmax = np.asarray(clmax, dtype=float)
+    stations = np.arange(len(clmax))
+    converged = ~np.isnan(clmax)
+    if not np.any(converged):
+        raise ValueError("xfoil did not converge at any angle of attack for any station")
+    return np.interp(stations, stations[converged], clmax[converged]), stations[~converged].tolist()
+
+
+def reynolds_clmax(job, reynolds_numbers, n_points=4, jobs=1):
+    # clmax of the section of job at every Reynolds number in reynolds_numbers. Xfoil only runs at n_points Reynolds
+    # numbers spaced logarithmically over their range, clmax is interpolated linearly in log(Re) in between. Reynolds
+    # numbers at which xfoil did not converge are left out of the interpolation
+    reynolds_numbers = np.asarray(reynolds_numbers, dtype=float)
+    low, high = reynolds_numbers.min(), reynolds_numbers.max()
+    samples = np.geomspace(low, high, n_points if high > low else 1)
+    clmax = parallel_clmax(jobs, [(job[0], re) + tuple(job[2:]) for re in samples])
+    converged = ~np.isnan(clmax)
+    if not np.any(converged):
+        raise ValueError("xfoil did not converge at any angle of attack at any of the Reynolds numbers")
+    return np.interp(np.log(reynolds_numbers), np.log(samples[converged]), clmax[converged])
@@ -0,0 +1,139 @@
+import os
+import re
+import shutil
+import numpy as np
+from solver_session import SolverSession, SessionError, pooled
+
+# XFOIL kept running between polars. Plotting is switched off once when the session starts (PLOP, G), so XFOIL
+# does not need to be patched for that. New sections are loaded from a coordinate file and repaneled, new Reynolds
+# and Mach numbers are set in the OPER menu; every polar is accumulated into a fresh polar file which is read back.
+# Every command line is answered by exactly one prompt, so lines are sent one by one.
+
+
+def xfoil_executable():
+    return os.environ.get("XFOIL_EXE") or shutil.which("xfoil") or "xfoil"
+
+
+def read_polar(file_name):
+    # Rows (alpha, cl, cd, cdp, cm, top_xtr, bot_xtr) of an XFOIL polar file, like run_xfoil returns them
+    rows = []
+    with open(file_name) as f:
+        lines = f.read().splitlines()
+    start = [i for i, line in enumerate(lines) if line.strip().startswith("---")]
+    for line in lines[start[-1] + 1 if start else 0:]:
+        try:
+            rows.append(tuple(float(value) for value in line.split()))
+        except ValueError:
+            continue
+    return [row for row in rows if row]
+
+
+def parse_point(text):
+    # (alpha, cl) of a single point solved in OPER, None if the viscous solution did not converge
+    if "Convergence failed" in text:
+        return None
+    points = re.findall(r"a\s*=\s*(-?\d+\.?\d*)\s+CL\s*=\s*(-?\d+\.?\d*)", text)
+    return (float(points[-1][0]), float(points[-1][1])) if points else None
+
+
+default_iterations = 100   # viscous iterations per point (ITER)
+
+
+def polar_script(reynolds_number, alpha, mach, iterations=default_iterations):
+    # Commands of a complete XFOIL run that writes the polar of section.dat to polar.txt, for feeding XFOIL all at once
+    return ["PLOP", "G", "", "NORM", "LOAD section.dat", "PANE", "OPER", "VISC %g" % reynolds_number,
+            "MACH %g" % mach, "ITER %d" % iterations, "PACC", "polar.txt", "", "ASEQ %g %g %g" % tuple(alpha), "PACC",
+            "", "QUIT"]
+
+
+def write_section(file_name, points):
+    with open(file_name, "w") as f:
+        f.write("section\n" + "".join("%.6f %.6f\n" % tuple(p) for p in points))
+
+
+class XfoilSession(SolverSession):
+    prompt = r"[a-zA-Z]>\s*$"   # command (c>) as well as file name and number prompts
+
+    def __init__(self, executable=None, cwd=None, timeout=120, iterations=default_iterations):
+        super().__init__(xfoil_executable() if executable is None else executable, cwd, timeout)
+        self.iterations = iterations
+        self.points = None
+        self.viscous = False
+
+    def start(self):
+        super().start()
+        self.points = None
+        self.viscous = False
+        self.expect()
+        self.script("PLOP", "G", "", "NORM")   # no plot window, normalize loaded airfoils
+
+    def script(self, *lines):   # sends the lines one at a time, each waits for the next prompt
+        return "".join(self.run(line) for line in lines)
+
+    def load(self, points):
+        # Loads and repanels the airfoil points, (x, y) from the trailing edge over the top to the bottom
+        points = [tuple(p) for p in points]
+        if self.alive and points == self.points:
+            return False
+        if not self.alive:
+            self.start()
+        write_section(os.path.join(self.cwd, "section.dat"), points)
+        self.script("LOAD section.dat", "PANE")
+        self.points = points
+        return True
+
+    def polar(self, points, reynolds_number, alpha, mach):
+        # Polar of the section over alpha = (start, end, step), rows as in read_polar
+        new_section = self.load(points)
+        polar_file = os.path.join(self.cwd, "polar.txt")
+        if os.path.exists(polar_file):      # xfoil would append to an existing polar file
+            os.remove(polar_file)
+        reynolds = ("RE %g" if self.viscous else "VISC %g") % reynolds_number   # VISC toggles viscous mode
+        self.script("OPER", reynolds, "MACH %g" % mach, "ITER %d" % self.iterations)
+        self.viscous = True
+        if not new_section:
+            self.script("INIT")     # start the boundary layer from scratch for the new Reynolds number
+        self.script("PACC", "polar.txt", "", "ASEQ %g %g %g" % tuple(alpha), "PACC", "")
+        return read_polar(polar_file)
+
+    def march(self, points, reynolds_number, mach, alpha_max=30, step=1, drop=0.05, budget=30):
+        # Polar solved one point at a time, marching alpha upward from the zero lift angle until cl has clearly peaked:
+        # two converged points in a row more than drop below the highest cl. Every point may take budget seconds,
+        # a hanging XFOIL is killed. Returns the converged (alpha, cl) rows and a status: "converged" when the peak
+        # was found, "no_peak" when alpha_max was reached first, "failed" without any converged point and "timeout"
+        # when XFOIL was killed
+        new_section = self.load(points)
+        reynolds = ("RE %g" if self.viscous else "VISC %g") % reynolds_number
+        self.script("OPER", reynolds, "MACH %g" % mach, "ITER %d" % self.iterations)
+        self.viscous = True
+        if not new_section:
+            self.script("INIT")
+        rows = []
+        try:
+            zero_lift = parse_point(self.run("CL 0", timeout=budget))
+            alpha = np.floor(zero_lift[0]) if zero_lift is not None else 0.0
+            below = 0
+            status = "no_peak"
+            while alpha <= alpha_max:
+                point = parse_point(self.run("ALFA %g" % alpha, timeout=budget))
+                if point is None:
+                    self.run("INIT")    # do not start the next point from the failed boundary layer
+                else:
+                    rows.append(point)
+                    below = below + 1 if point[1] < max(row[1] for row in rows) - drop else 0
+                    if below == 2:
+                        status = "converged"
+                        break
+                alpha = alpha + step
+            self.run("")    # back to the main menu
+        except SessionError:    # expect() has killed XFOIL, the next polar starts a new one
+            return rows, "timeout"
+        return rows, status if rows else "failed"
+
+    def polars(self, sections):
+        # Polars of many (points, reynolds_number, alpha, mach) sections in one session, loading each section once
+        return [self.polar(*section) for section in sections]
+
+
+def xfoil_session(executable=None):    # the XFOIL session of this process and thread, started on first use
+    return pooled("xfoil", lambda: XfoilSession(executable))